@@ -5,269 +5,552 @@ Generates professional space weather reports matching the quality standard
 Supports multiple AI providers through the model_providers abstraction layer.
 """
 
+import io
 import os
+import re
+import json
+import time
+import heapq
+import hashlib
+import random
+import asyncio
 import logging
-from typing import Dict, Optional
+import functools
+import importlib
+import threading
+from string import Template
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from html.parser import HTMLParser
+from types import MappingProxyType
+from typing import Dict, Final, List, Mapping, Optional
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 
-# Load environment variables from .env file
+# Optional: orjson serializes the JSON report in C (falls back to stdlib json)
 try:
-    from dotenv import load_dotenv
-    load_dotenv(Path(__file__).parent / '.env')
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    pass
-
-# Import the model providers system
-try:
-    from model_providers import get_provider, list_available_models, get_model_info
-    from model_providers.base import ProviderError
-    MODEL_PROVIDERS_AVAILABLE = True
-except ImportError:
-    MODEL_PROVIDERS_AVAILABLE = False
-
-# Legacy: Check if Anthropic SDK is available (fallback)
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Model listing when the model providers system is unavailable
+_LEGACY_MODELS = MappingProxyType({
+    'claude-sonnet-4.5': MappingProxyType({
+        'provider': 'anthropic',
+        'description': 'Default model (legacy mode)'
+    })
+})
+
+# Generation settings shared by single and batch report generation
+REPORT_MAX_TOKENS = 16000  # Reports that still hit this are continued
+REPORT_TEMPERATURE = 0.7  # Slightly creative for natural writing
+
+# Continuing a report that hit REPORT_MAX_TOKENS
+REPORT_MAX_CONTINUATIONS = 2
+CONTINUATION_TAIL_CHARS = 2000
+TRUNCATED_FINISH_REASONS = frozenset({'length', 'max_tokens', 'MAX_TOKENS'})
+
+# Log streaming progress every N chunks
+STREAM_LOG_INTERVAL = 200
+
+# Connection pool shared by the Anthropic/OpenAI SDK clients (timeout matches the SDK default)
+HTTP_MAX_KEEPALIVE = 64
+HTTP_MAX_CONNECTIONS = 128
+HTTP_TIMEOUT = 600.0
+
+# Rendered fallback reports are kept on disk across CLI invocations (LRU by mtime)
+FALLBACK_CACHE_DIR = Path.home() / '.cache' / 'space_weather_reports' / 'fallback'
+FALLBACK_CACHE_MAX_ENTRIES = 64
+
+# Data fields rendered as tables in the fallback report (part of its cache key)
+FALLBACK_TABLE_FIELDS = ('flares_detailed', 'cmes_observed', 'cmes_predicted')
+
+# Retry transient API failures (rate limits, timeouts) with jittered exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_MIN_WAIT = 1.0
+RETRY_MAX_WAIT = 10.0
+
+
+# Optional dependencies are imported on first use rather than at module import,
+# so the fallback template path does not pay for loading the provider SDKs.
+_UNPROBED = object()
+_model_providers = _UNPROBED
+_anthropic_class = _UNPROBED
+_shared_http_client = _UNPROBED
+_dotenv_loaded = False
+
+
+def _load_dotenv():
+    """Load environment variables from .env file (once per process)"""
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(Path(__file__).parent / '.env')
+    except ImportError:
+        pass
+
+
+def _get_model_providers():
+    """Import the model providers system, or return None if unavailable"""
+    global _model_providers
+    if _model_providers is _UNPROBED:
+        try:
+            import model_providers
+            _model_providers = model_providers
+        except ImportError:
+            _model_providers = None
+    return _model_providers
 
-class AIReportGenerator:
-    """
-    Generate professional space weather reports using AI models.
-
-    Supports multiple providers (Anthropic Claude, OpenAI GPT, Google Gemini) through
-    a unified interface. Use the model_name parameter to select which
-    model to use for report generation.
 
-    Usage:
-        # Use default model (from config.yaml)
-        generator = AIReportGenerator()
+def _get_anthropic():
+    """Legacy: import the Anthropic SDK client class, or return None if unavailable"""
+    global _anthropic_class
+    if _anthropic_class is _UNPROBED:
+        try:
+            from anthropic import Anthropic
+            _anthropic_class = Anthropic
+        except ImportError:
+            _anthropic_class = None
+    return _anthropic_class
 
-        # Use specific model
-        generator = AIReportGenerator(model_name="gpt-4o")
 
-        # Generate report
-        reports = generator.generate_report(data)
+def _get_shared_http_client():
     """
+    Get the process-wide httpx client used by the Anthropic and OpenAI SDKs
 
-    def __init__(
-        self,
-        api_key: Optional[str] = None,
-        use_modular_prompts: bool = False,
-        model_name: Optional[str] = None
-    ):
-        """
-        Initialize the report generator
-
-        Args:
-            api_key: API key for the provider (uses environment variable if not provided)
-            use_modular_prompts: If True, use YAML-based modular prompts instead of hardcoded
-            model_name: Name of the model to use (e.g., "claude-sonnet-4.5", "gpt-4o")
-                       If None, uses default from config.yaml
-        """
-        self.use_modular_prompts = use_modular_prompts or os.getenv('USE_MODULAR_PROMPTS', '').lower() == 'true'
-        self.model_name = model_name
-        self._provider = None
-        self._api_key = api_key
+    One tuned connection pool (HTTP/2 when the h2 package is installed) is
+    shared by every client so concurrent batch requests reuse connections
+    instead of each client opening its own.
 
-        # Try to initialize with model providers system
-        if MODEL_PROVIDERS_AVAILABLE:
+    Returns:
+        httpx.Client, or None if httpx is unavailable (SDK defaults are used)
+    """
+    global _shared_http_client
+    if _shared_http_client is _UNPROBED:
+        try:
+            import httpx
             try:
-                self._provider = get_provider(model_name, api_key=api_key)
-                self.enabled = True
-                self.model_name = self._provider.model_name
-                logger.info(f"Initialized with model provider: {self._provider}")
-            except ProviderError as e:
-                logger.warning(f"Could not initialize model provider: {e}")
-                self._provider = None
-                self.enabled = False
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            _shared_http_client = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=HTTP_MAX_KEEPALIVE, max_connections=HTTP_MAX_CONNECTIONS),
+                http2=http2,
+                timeout=HTTP_TIMEOUT
+            )
+        except ImportError:
+            _shared_http_client = None
+    return _shared_http_client
 
-        # Fallback to legacy Anthropic-only mode
-        if self._provider is None:
-            self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
-            if ANTHROPIC_AVAILABLE and self.api_key:
-                self.client = Anthropic(api_key=self.api_key)
-                self.enabled = True
-                self.model_name = "claude-sonnet-4.5"
-                logger.info("Initialized with legacy Anthropic client")
-            else:
-                self.client = None
-                self.enabled = False
-                logger.warning("No AI provider available - will use fallback templates")
 
-    @property
-    def provider_info(self) -> Dict:
-        """Get information about the current provider/model"""
-        if self._provider:
-            return self._provider.get_model_info()
-        elif hasattr(self, 'client') and self.client:
-            return {
-                'name': 'claude-sonnet-4.5',
-                'provider': 'anthropic',
-                'model_id': 'claude-sonnet-4-5-20250929',
-                'description': 'Legacy Anthropic client'
-            }
-        return {'name': 'fallback', 'provider': 'none', 'description': 'No AI provider'}
+# Modular prompt loader, created once per process (loading parses the YAML configs)
+_PROMPT_LOADER = None
+_PROMPT_LOADER_LOCK = threading.Lock()
 
-    @staticmethod
-    def list_available_models() -> Dict:
-        """
-        List all available models that can be used for report generation
 
-        Returns:
-            Dictionary of model name -> model info
-        """
-        if MODEL_PROVIDERS_AVAILABLE:
-            models = list_available_models()
-            return {name: config.to_dict() for name, config in models.items()}
-        return {
-            'claude-sonnet-4.5': {
-                'provider': 'anthropic',
-                'description': 'Default model (legacy mode)'
-            }
-        }
-    
-    def generate_report(self, data: Dict) -> Dict[str, str]:
-        """
-        Generate comprehensive space weather report using AI
+def _get_prompt_loader():
+    """
+    Get the shared PromptConfigLoader
 
-        Args:
-            data: Dictionary containing NOAA discussion and other source data
+    Returns:
+        PromptConfigLoader instance
 
-        Returns:
-            Dictionary with report formats (html, markdown, json, text)
-        """
-        if not self.enabled:
-            return self._generate_fallback_report(data)
+    Raises:
+        ImportError: If the prompt_config package is not available
+    """
+    global _PROMPT_LOADER
+    if _PROMPT_LOADER is None:
+        with _PROMPT_LOADER_LOCK:
+            if _PROMPT_LOADER is None:
+                from prompt_config.prompt_loader import PromptConfigLoader
+                _PROMPT_LOADER = PromptConfigLoader()
+    return _PROMPT_LOADER
 
-        try:
-            # Build comprehensive prompt (modular or hardcoded)
-            if self.use_modular_prompts:
-                prompt = self._build_modular_prompt(data)
-            else:
-                prompt = self._build_detailed_prompt(data)
 
-            # Generate using the appropriate method
-            if self._provider:
-                # Use new model providers system
-                html_report = self._generate_with_provider(prompt)
-            else:
-                # Legacy Anthropic-only path
-                html_report = self._generate_with_legacy_client(prompt)
+# Providers shared across generator instances, keyed by (model_name, api_key),
+# so every report for the same model reuses one SDK client and its connection pool
+_PROVIDER_CACHE: Dict[tuple, object] = {}
+_PROVIDER_CACHE_LOCK = threading.Lock()
 
-            # Append data tables after main report content
-            html_report = self._append_data_tables(html_report, data)
 
-            # Generate other formats
-            return {
-                'html': html_report,
-                'markdown': self._convert_to_markdown(html_report),
-                'json': self._convert_to_json(data),
-                'text': self._convert_to_text(html_report)
-            }
+def _get_shared_provider(model_name: Optional[str], api_key: Optional[str]):
+    """
+    Get the process-wide provider instance for a model/key pair
 
-        except Exception as e:
-            logger.error(f"Error generating report: {e}", exc_info=True)
-            print(f"Error generating report with AI: {e}")
-            return self._generate_fallback_report(data)
+    Args:
+        model_name: Model name passed to get_provider (None for the default model)
+        api_key: Explicit API key, or None to use the environment
 
-    def _generate_with_provider(self, prompt: str) -> str:
-        """
-        Generate report content using the model providers system
+    Returns:
+        ModelProvider instance
 
-        Args:
-            prompt: The complete prompt to send to the model
+    Raises:
+        ProviderError: If the provider cannot be created
+    """
+    key = (model_name, api_key)
+    with _PROVIDER_CACHE_LOCK:
+        provider = _PROVIDER_CACHE.get(key)
+        if provider is None:
+            provider = _get_model_providers().get_provider(model_name, api_key=api_key)
+            provider.http_client = _get_shared_http_client()
+            _PROVIDER_CACHE[key] = provider
+    return provider
+
+
+def _api_error_types() -> tuple:
+    """Exception types raised when an AI call fails, as opposed to a bug in the generator"""
+    types = []
+    providers = _get_model_providers()
+    if providers:
+        types.append(providers.ProviderError)
+    if _get_anthropic():
+        import anthropic
+        types.append(anthropic.APIError)
+    return tuple(types)
+
+
+@functools.lru_cache(maxsize=1)
+def _transient_error_types() -> tuple:
+    """Rate-limit and timeout exception types from whichever SDKs are installed"""
+    types = []
+    for module_name, names in (
+        ('anthropic', ('RateLimitError', 'APITimeoutError')),
+        ('openai', ('RateLimitError', 'APITimeoutError')),
+        ('google.api_core.exceptions', ('ResourceExhausted', 'DeadlineExceeded')),
+        ('httpx', ('TimeoutException',)),
+    ):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        types.extend(getattr(module, name) for name in names if hasattr(module, name))
+    return tuple(types)
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Check whether an error (or the SDK error a ProviderError wraps) is worth retrying"""
+    original = getattr(error, 'original_error', None) or error
+    return isinstance(original, _transient_error_types())
+
+
+@functools.lru_cache(maxsize=8)
+def _detailed_prompt_instructions(now_date: str, yesterday_date: str) -> str:
+    """Static instructions of the detailed prompt, substituted once per report date"""
+    return _PROMPT_INSTRUCTIONS_TEMPLATE.substitute(
+        _TEMPLATE_URLS,
+        now_date=now_date,
+        yesterday_date=yesterday_date,
+        linking_block=_LINKING_BLOCK
+    )
+
+
+# Flare class letter -> (minimum magnitude, activity level, radio blackout),
+# ordered by descending threshold; the last row of each class always matches
+_FLARE_ACTIVITY_TIERS = {
+    'X': ((0.0, 'very high', 'R3 (Strong)'),),
+    'M': ((5.0, 'high', 'R2 (Moderate)'), (0.0, 'moderate to high', 'R1 (Minor)')),
+    'C': ((5.0, 'moderate', None), (0.0, 'low to moderate', None)),
+}
+# Markers for notable flares in the flare list
+_FLARE_CLASS_MARKERS = {'X': " 🔴", 'M': " 🟠"}
+_FLARE_MAGNITUDE_STRIP_RE = re.compile(r'[^0-9.]')
+
+def _json_default(obj):
+    """Serialize values json does not support: datetimes as ISO 8601 (naive ones are UTC), others via str()"""
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return str(obj)
+
+
+# Shared encoder for the JSON report; reports are written as UTF-8, so
+# non-ASCII characters are emitted directly instead of \u-escaped
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2, default=_json_default)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize a report payload as indented JSON, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(
+                obj,
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+            ).decode('utf-8')
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which json handles
+            pass
+    return _JSON_ENCODER.encode(obj)
 
-        Returns:
-            HTML report content
-        """
-        logger.info(f"Generating report with {self._provider.model_name}")
 
-        response = self._provider.generate(
-            prompt=prompt,
-            max_tokens=16000,
-            temperature=0.7  # Slightly creative for natural writing
-        )
+# Collapses runs of blank lines left behind by removed tags
+_WS_RE = re.compile(r'\n\s*\n')
 
-        logger.info(
-            f"Report generated: {response.output_tokens} tokens, "
-            f"finish_reason={response.finish_reason}"
-        )
+# Plain-text conversion: collapses blank-line runs and runs of spaces
+_TEXT_WS_RE = re.compile(r'\n\s*\n|  +')
 
-        return self._extract_html(response.content)
 
-    def _generate_with_legacy_client(self, prompt: str) -> str:
-        """
-        Generate report content using legacy Anthropic client
+def _strip_tags(html: str) -> str:
+    """
+    Remove <...> tags with a linear str.find scan
 
-        Args:
-            prompt: The complete prompt to send to Claude
+    Matches the old r'<[^>]+>' substitution ("<>" and an unclosed "<" are kept
+    as text) without the regex's quadratic rescans on unclosed tags.
+    """
+    out = []
+    append = out.append
+    pos = 0
+    while True:
+        start = html.find('<', pos)
+        if start == -1:
+            break
+        end = html.find('>', start + 1)
+        if end == -1:
+            break
+        if end == start + 1:
+            # "<>" is not a tag; keep the "<" and carry on after it
+            append(html[pos:start + 1])
+            pos = start + 1
+            continue
+        append(html[pos:start])
+        pos = end + 1
+    append(html[pos:])
+    return ''.join(out)
+
+
+def _replace_text_ws(match: re.Match) -> str:
+    """Collapse a blank-line run to one blank line, or a space run to one space"""
+    return '\n\n' if match.group()[0] == '\n' else ' '
+
+
+class _MarkdownConverter(HTMLParser):
+    """
+    Single-pass HTML -> Markdown converter for generated reports
+
+    Converts headings (h3/h4), strong/em, list items and links, drops
+    <ul>/</ul>, and passes every other tag, entity and comment through
+    unchanged. Output matches the per-tag regex substitutions this replaced:
+    - Only exact attribute-less start tags (and <a href="...">) and exact
+      lowercase end tags are converted
+    - An element pairs with the first matching end tag; a second start tag
+      of the same kind before it is left as written
+    - Elements other than list items only convert when they end on the same
+      line; elements that never end are left as written
+    The one intended difference is nested list items, which are converted
+    instead of leaving raw <li>/</li> tags behind.
+    """
 
-        Returns:
-            HTML report content
-        """
-        logger.info("Generating report with legacy Anthropic client")
+    # Attribute-less tag -> (opening markdown, closing markdown)
+    MARKUP = {
+        'h3': ('## ', ''),
+        'h4': ('### ', ''),
+        'strong': ('**', '**'),
+        'em': ('*', '*'),
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._parts = []
+        # Single-line elements awaiting their end tag: tag -> (index of the
+        # start tag in _parts, opening markdown, closing markdown)
+        self._open = {}
+        self._items = []  # Indexes of open <li> start tags in _parts
+        self._endtag_text = ''
+
+    def _write(self, text):
+        # A line break ends every open single-line element unconverted
+        if '\n' in text:
+            self._open.clear()
+        self._parts.append(text)
+
+    def _start(self, tag, raw, opening, closing):
+        """Emit a start tag as written; it is swapped for markdown if the element ends"""
+        self._open[tag] = (len(self._parts), opening, closing)
+        self._parts.append(raw)
+
+    def parse_endtag(self, i):
+        # Keep the end tag as written; handle_endtag only receives the lowercased name
+        self._endtag_text = self.rawdata[i:self.rawdata.find('>', i) + 1]
+        return super().parse_endtag(i)
+
+    def handle_starttag(self, tag, attrs):
+        raw = self.get_starttag_text()
+        if raw == '<ul>':
+            return
+        if raw == '<li>':
+            self._items.append(len(self._parts))
+            self._parts.append(raw)
+        elif raw == f'<{tag}>' and tag in self.MARKUP and tag not in self._open:
+            self._start(tag, raw, *self.MARKUP[tag])
+        elif tag == 'a' and raw.startswith('<a href="') and 'a' not in self._open:
+            if '\n' in raw:
+                self._open.clear()
+            href = raw[9:raw.index('"', 9)]
+            self._start(tag, raw, '[', f']({href})')
+        else:
+            self._write(raw)
+
+    def handle_endtag(self, tag):
+        raw = self._endtag_text
+        if raw == '</ul>':
+            return
+        if raw == '</li>' and self._items:
+            self._parts[self._items.pop()] = '- '
+        elif raw == f'</{tag}>' and tag in self._open:
+            idx, opening, closing = self._open.pop(tag)
+            self._parts[idx] = opening
+            self._parts.append(closing)
+        else:
+            self._write(raw)
+
+    def handle_startendtag(self, tag, attrs):
+        self._write(self.get_starttag_text())
+
+    def handle_data(self, data):
+        self._write(data)
+
+    def handle_entityref(self, name):
+        self._write(f'&{name};')
+
+    def handle_charref(self, name):
+        self._write(f'&#{name};')
+
+    def handle_comment(self, data):
+        self._write(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self._write(f'<!{decl}>')
+
+    def unknown_decl(self, data):
+        self._write(f'<![{data}]>')
+
+    def handle_pi(self, data):
+        self._write(f'<?{data}>')
+
+    def convert(self, html: str) -> str:
+        """Convert an HTML fragment, returning the Markdown text"""
+        self.feed(html)
+        self.close()
+        # Elements that never ended keep their start tags as written
+        return ''.join(self._parts)
+
+
+# Reference URLs linked from the prompt, each defined once
+_URL_UTC_TIME: Final[str] = 'https://earthsky.org/astronomy-essentials/universal-time/'
+_URL_SOLAR_FLARE: Final[str] = 'https://en.wikipedia.org/wiki/Solar_flare'
+_URL_FLARE_CLASSES: Final[str] = 'https://earthsky.org/sun/solar-flares-classification-m-x-c-b-a/'
+_URL_X_FLARES: Final[str] = 'https://earthsky.org/sun/x-flares-most-powerful-solar-flare/'
+_URL_CME: Final[str] = 'https://earthsky.org/sun/what-are-coronal-mass-ejections/'
+_URL_CORONAL_DIMMING: Final[str] = 'https://en.wikipedia.org/wiki/Coronal_mass_ejection#Coronal_signatures'
+_URL_SOLAR_WIND: Final[str] = 'https://www.swpc.noaa.gov/phenomena/solar-wind'
+_URL_CORONAL_HOLES: Final[str] = 'https://www.swpc.noaa.gov/phenomena/coronal-holes'
+_URL_NOAA_SCALES: Final[str] = 'https://www.swpc.noaa.gov/noaa-scales-explanation'
+_URL_RADIO_BLACKOUTS: Final[str] = 'https://www.swpc.noaa.gov/phenomena/solar-flares-radio-blackouts'
+_URL_GEOMAGNETIC_STORMS: Final[str] = 'https://www.swpc.noaa.gov/phenomena/geomagnetic-storms'
+_URL_KP_INDEX: Final[str] = 'https://www.swpc.noaa.gov/products/planetary-k-index'
+_URL_SUVI: Final[str] = 'https://www.swpc.noaa.gov/products/goes-solar-ultraviolet-imager-suvi'
+_URL_SOLAR_COORDINATES: Final[str] = 'https://en.wikipedia.org/wiki/Solar_coordinate_systems'
+_URL_MAGNETIC_CLASS: Final[str] = 'https://www.spaceweatherlive.com/en/help/the-magnetic-classification-of-sunspots.html'
+_URL_MCINTOSH_CLASS: Final[str] = 'https://www.spaceweatherlive.com/en/help/the-classification-of-sunspots-after-malde.html'
+_URL_IMF: Final[str] = 'https://www.spaceweatherlive.com/en/help/the-interplanetary-magnetic-field-imf.html'
+_URL_BZ: Final[str] = 'https://icelandatnight.is/bz-level'
+_URL_SDO: Final[str] = 'https://sdo.gsfc.nasa.gov/'
+_URL_SOHO: Final[str] = 'https://soho.nascom.nasa.gov/'
+_URL_GOES: Final[str] = 'https://www.nasa.gov/content/goes'
+_URL_RADIO_BURSTS: Final[str] = 'https://www.ncei.noaa.gov/products/space-weather/legacy-data/solar-radio-datasets'
+_URL_SOLAR_CYCLE: Final[str] = 'https://www.swpc.noaa.gov/products/solar-cycle-progression'
+
+# Reference link formats for the detailed prompt; constant, so it is built once
+# at import and substituted into the instructions
+_LINKING_BLOCK: Final[str] = f"""# CRITICAL LINKING REQUIREMENTS
 
-        message = self.client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=16000,
-            temperature=0.7,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+**ALWAYS use these exact link formats, organized by category:**
 
-        return self._extract_html(message.content[0].text)
-    
-    def _build_detailed_prompt(self, data: Dict) -> str:
-        """Build detailed prompt with comprehensive instructions and examples"""
-        from datetime import timezone
+## Solar Phenomena
 
-        # Use UTC time for all dates
-        now = datetime.now(timezone.utc)
-        yesterday = now - timedelta(days=1)
+- UTC times: `<a href="{_URL_UTC_TIME}" target="_blank" rel="noopener">[time] UTC</a>`
+- Solar flares (general): `<a href="{_URL_SOLAR_FLARE}" target="_blank" rel="noopener">C-class/M-class [flare/flares]</a>`
+- Solar flare classification: `<a href="{_URL_FLARE_CLASSES}" target="_blank" rel="noopener">M-class flares</a>` (when discussing the classification system)
+- X-class flares: `<a href="{_URL_X_FLARES}" target="_blank" rel="noopener">X-class [flare/flares/X#.#]</a>`
+- Coronal mass ejections: `<a href="{_URL_CME}" target="_blank" rel="noopener">coronal mass ejection[s] (CME[s])</a>`
+- Coronal dimming: `<a href="{_URL_CORONAL_DIMMING}" target="_blank" rel="noopener">coronal dimming</a>`
+- Solar wind: `<a href="{_URL_SOLAR_WIND}" target="_blank" rel="noopener">solar wind</a>`
+- Coronal holes: `<a href="{_URL_CORONAL_HOLES}" target="_blank" rel="noopener">coronal hole[s]</a>`
 
-        prompt = f"""You are an expert space weather forecaster creating a comprehensive daily report.
+## NOAA Scales and Products
 
-Generate a professional space weather report for {now.strftime('%B %d, %Y')} (UTC) covering the period from 11 UTC {yesterday.strftime('%B %d')} to 11 UTC {now.strftime('%B %d')}.
+- NOAA R-scale (radio blackouts): `<a href="{_URL_NOAA_SCALES}" target="_blank" rel="noopener">R1/R2/R3/R4/R5</a>` with descriptor in parentheses
+- NOAA G-scale (geomagnetic storms): `<a href="{_URL_NOAA_SCALES}" target="_blank" rel="noopener">G1/G2/G3/G4/G5</a>` with descriptor in parentheses
+- Radio blackouts phenomenon: `<a href="{_URL_RADIO_BLACKOUTS}" target="_blank" rel="noopener">radio blackout[s]</a>`
+- Geomagnetic storms: `<a href="{_URL_GEOMAGNETIC_STORMS}" target="_blank" rel="noopener">geomagnetic storm[s]</a>`
+- Kp index: `<a href="{_URL_KP_INDEX}" target="_blank" rel="noopener">Kp</a>`
+- SUVI instrument: `<a href="{_URL_SUVI}" target="_blank" rel="noopener">SUVI</a>`
 
-# PRIMARY DATA SOURCES
+## Sunspot Classifications
+
+- Solar coordinates: `<a href="{_URL_SOLAR_COORDINATES}" target="_blank" rel="noopener">[location like N24E53]</a>`
+- Magnetic classification: `<a href="{_URL_MAGNETIC_CLASS}" target="_blank" rel="noopener">[alpha/beta/beta-gamma/beta-gamma-delta]</a>`
+- McIntosh classification: `<a href="{_URL_MCINTOSH_CLASS}" target="_blank" rel="noopener">[Axx/Bxo/Cao/Dao/Ekc/etc.]</a>`
 
-## NOAA SWPC Discussion (Most Authoritative)
-{data.get('noaa_discussion', 'Not available')}
+## Interplanetary Medium
+
+- Interplanetary Magnetic Field: `<a href="{_URL_IMF}" target="_blank" rel="noopener">interplanetary magnetic field (IMF)</a>`
+- Bz component: `<a href="{_URL_BZ}" target="_blank" rel="noopener">Bz</a>`
 
-## UK Met Office Space Weather Forecast
-{data.get('uk_met_office', 'Not available')}
+## Spacecraft and Missions
 
-## SIDC (Solar Influences Data analysis Center) Forecast
-{data.get('sidc_forecast', 'Not available')}
+- Solar Dynamics Observatory: `<a href="{_URL_SDO}" target="_blank" rel="noopener">SDO</a>` or `<a href="{_URL_SDO}" target="_blank" rel="noopener">NASA/SDO</a>`
+- SOHO mission: `<a href="{_URL_SOHO}" target="_blank" rel="noopener">SOHO</a>` or `<a href="{_URL_SOHO}" target="_blank" rel="noopener">NASA/SOHO</a>`
+- GOES satellites: `<a href="{_URL_GOES}" target="_blank" rel="noopener">GOES-[#]</a>`
 
-## 24-Hour Flare Tracking Database
-{self._format_flare_summary(data.get('flare_summary'))}
+## Special Resources
 
-## CME Tracking Database (Enhanced with Analyses & Model Runs)
-{self._format_cme_data(data.get('cmes_observed', []))}
+- Radio burst data: `<a href="{_URL_RADIO_BURSTS}" target="_blank" rel="noopener">[Type II/Type IV] radio burst</a>`
+- Solar cycle tracking: `<a href="{_URL_SOLAR_CYCLE}" target="_blank" rel="noopener">Solar Cycle [#]</a>`"""
+
+# URLs substituted into the instructions template
+_TEMPLATE_URLS: Final[Mapping[str, str]] = MappingProxyType({
+    'url_utc_time': _URL_UTC_TIME,
+    'url_solar_flare': _URL_SOLAR_FLARE,
+    'url_x_flares': _URL_X_FLARES,
+    'url_cme': _URL_CME,
+    'url_noaa_scales': _URL_NOAA_SCALES,
+    'url_radio_blackouts': _URL_RADIO_BLACKOUTS,
+    'url_solar_coordinates': _URL_SOLAR_COORDINATES,
+    'url_magnetic_class': _URL_MAGNETIC_CLASS,
+    'url_mcintosh_class': _URL_MCINTOSH_CLASS,
+    'url_imf': _URL_IMF,
+    'url_bz': _URL_BZ,
+})
+
+# The detailed prompt is assembled from parts and joined once: a dated header,
+# one section per data source, then the static instructions (dates only vary)
+_PROMPT_HEADER_TEMPLATE = Template("""You are an expert space weather forecaster creating a comprehensive daily report.
+
+Generate a professional space weather report for $report_date (UTC) covering the period from 11 UTC $yesterday_date to 11 UTC $now_date.
 
-## CME Arrival Predictions (Forecast Period)
-{self._format_cme_data(data.get('cmes_predicted', []))}
+# PRIMARY DATA SOURCES
 
-## Alternative Sources (For Context)
-{self._format_alternative_sources(data.get('alternative_sources', {}))}
+""")
 
-# REPORT STRUCTURE AND REQUIREMENTS
+_PROMPT_INSTRUCTIONS_TEMPLATE = Template("""# REPORT STRUCTURE AND REQUIREMENTS
 
 Create an HTML report with this EXACT structure:
 
 ## Header Section
 ```html
-<h3>Sun news {now.strftime('%B %d')} (UTC): [Compelling 3-7 word headline summarizing main story]</h3>
-<h4>(11 UTC {yesterday.strftime('%B %d')} → 11 UTC {now.strftime('%B %d')})</h4>
+<h3>Sun news $now_date (UTC): [Compelling 3-7 word headline summarizing main story]</h3>
+<h4>(11 UTC $yesterday_date → 11 UTC $now_date)</h4>
 ```
 
 ## Top Story Paragraph
@@ -389,7 +672,7 @@ Structure:
 ```html
 <li><strong>Flare activity:</strong> Solar activity [was/remained at/increased to] [low/moderate/high] levels, with [X] flares observed.
   <ul>
-    <li><strong>Strongest flare:</strong> [Class and value] from [region or location] at <a href="https://earthsky.org/astronomy-essentials/universal-time/" target="_blank" rel="noopener">[time UTC]</a> on [date]. [If M1+ and caused radio blackout: It triggered an <a href="https://www.swpc.noaa.gov/noaa-scales-explanation" target="_blank" rel="noopener">R1</a> (minor) <a href="https://www.swpc.noaa.gov/phenomena/solar-flares-radio-blackouts" target="_blank" rel="noopener">radio blackout</a> affecting [region].]</li>
+    <li><strong>Strongest flare:</strong> [Class and value] from [region or location] at <a href="$url_utc_time" target="_blank" rel="noopener">[time UTC]</a> on [date]. [If M1+ and caused radio blackout: It triggered an <a href="$url_noaa_scales" target="_blank" rel="noopener">R1</a> (minor) <a href="$url_radio_blackouts" target="_blank" rel="noopener">radio blackout</a> affecting [region].]</li>
     <li>Other notable flares: [List other significant flares with times]</li>
     <li>[Region X] was the top flare producer, responsible for [Y] flares including [types].</li>
   </ul>
@@ -477,7 +760,7 @@ CRITICAL FLARE DETAILS:
 ```html
 <li><strong>Sunspot regions:</strong> The Earth-facing solar disk displayed [X] numbered active regions.
   <ul>
-    <li><strong>AR####</strong> (<a href="https://en.wikipedia.org/wiki/Solar_coordinate_systems" target="_blank" rel="noopener">[location like N10W29]</a>, <a href="https://www.spaceweatherlive.com/en/help/the-classification-of-sunspots-after-malde.html" target="_blank" rel="noopener">[spot type]</a>, <a href="https://www.spaceweatherlive.com/en/help/the-magnetic-classification-of-sunspots.html" target="_blank" rel="noopener">[magnetic class]</a>) [maintained/gained/lost] its [configuration] and [activity summary].</li>
+    <li><strong>AR####</strong> (<a href="$url_solar_coordinates" target="_blank" rel="noopener">[location like N10W29]</a>, <a href="$url_mcintosh_class" target="_blank" rel="noopener">[spot type]</a>, <a href="$url_magnetic_class" target="_blank" rel="noopener">[magnetic class]</a>) [maintained/gained/lost] its [configuration] and [activity summary].</li>
     <li>[Continue for each significant region]</li>
     <li>The remaining regions [description of other regions].</li>
   </ul>
@@ -496,7 +779,7 @@ CRITICAL REGION DETAILS:
 <li><strong>Blasts from the sun?</strong> [If CMEs detected: Describe each CME with complete analysis data. If no CMEs: No Earth-directed coronal mass ejections were observed during the period.]
   <ul>
     [For each CME with Earth impact:]
-    <li>A [halo/partial halo] <a href="https://earthsky.org/sun/what-are-coronal-mass-ejections/" target="_blank" rel="noopener">coronal mass ejection (CME)</a> erupted at <a href="time-link">[time UTC]</a> on [date] from <a href="coord-link">[source location]</a> (<strong>AR [region]</strong>), associated with the [flare class/magnitude] flare. Analysis shows:
+    <li>A [halo/partial halo] <a href="$url_cme" target="_blank" rel="noopener">coronal mass ejection (CME)</a> erupted at <a href="time-link">[time UTC]</a> on [date] from <a href="coord-link">[source location]</a> (<strong>AR [region]</strong>), associated with the [flare class/magnitude] flare. Analysis shows:
       <ul>
         <li><strong>Leading Edge (LE) analysis ([speed] km/s):</strong> [Number] model run(s) predict Earth arrival [timing details]. [If Kp estimates available: Kp indices forecast to reach [range], indicating <a href="G-scale-link">G[#] ([severity])</a> geomagnetic storm potential.]</li>
         [If Shock Front analysis exists:]
@@ -568,7 +851,7 @@ EXAMPLES:
 
 ### 4. Solar Wind
 ```html
-<li><strong>Solar wind:</strong> Solar wind speeds [increased/decreased/remained steady], averaging [speed] km/s with a peak of [speed] km/s at [time UTC]. The <a href="https://www.spaceweatherlive.com/en/help/the-interplanetary-magnetic-field-imf.html" target="_blank" rel="noopener">interplanetary magnetic field (IMF)</a> [was/remained] [weak/moderate/strong] at [value] nT. The <a href="https://icelandatnight.is/bz-level" target="_blank" rel="noopener">Bz</a> component [fluctuated/remained] [northward/southward], with [description]. A southward Bz favors auroras.</li>
+<li><strong>Solar wind:</strong> Solar wind speeds [increased/decreased/remained steady], averaging [speed] km/s with a peak of [speed] km/s at [time UTC]. The <a href="$url_imf" target="_blank" rel="noopener">interplanetary magnetic field (IMF)</a> [was/remained] [weak/moderate/strong] at [value] nT. The <a href="$url_bz" target="_blank" rel="noopener">Bz</a> component [fluctuated/remained] [northward/southward], with [description]. A southward Bz favors auroras.</li>
 ```
 
 CRITICAL SOLAR WIND DETAILS:
@@ -595,7 +878,7 @@ CRITICAL GEOMAGNETIC DETAILS:
 ```html
 <h3>What's ahead? Sun–Earth forecast</h3>
 <ul>
-  <li><strong>Flare activity forecast:</strong> [Low/Moderate/High] levels are expected, with a [X]% chance of <a href="https://en.wikipedia.org/wiki/Solar_flare" target="_blank" rel="noopener">M-class</a> (<a href="https://www.swpc.noaa.gov/noaa-scales-explanation" target="_blank" rel="noopener">R1-R2</a>) flares from [regions]. A [slight/moderate] ([Y]%) chance remains for an <a href="https://earthsky.org/sun/x-flares-most-powerful-solar-flare/" target="_blank" rel="noopener">X-class</a> event, mainly from [regions].</li>
+  <li><strong>Flare activity forecast:</strong> [Low/Moderate/High] levels are expected, with a [X]% chance of <a href="$url_solar_flare" target="_blank" rel="noopener">M-class</a> (<a href="$url_noaa_scales" target="_blank" rel="noopener">R1-R2</a>) flares from [regions]. A [slight/moderate] ([Y]%) chance remains for an <a href="$url_x_flares" target="_blank" rel="noopener">X-class</a> event, mainly from [regions].</li>
   <li><strong>Geomagnetic activity forecast:</strong>
     <ul>
       <li><strong>[Date]:</strong> [Forecast with specific conditions and G-scale probabilities]</li>
@@ -680,51 +963,7 @@ CRITICAL FORECAST DETAILS:
    - "...took a breather..." (for quiet periods)
    - "Even so, our star remains restless..." (transition showing ongoing potential)
 
-# CRITICAL LINKING REQUIREMENTS
-
-**ALWAYS use these exact link formats, organized by category:**
-
-## Solar Phenomena
-
-- UTC times: `<a href="https://earthsky.org/astronomy-essentials/universal-time/" target="_blank" rel="noopener">[time] UTC</a>`
-- Solar flares (general): `<a href="https://en.wikipedia.org/wiki/Solar_flare" target="_blank" rel="noopener">C-class/M-class [flare/flares]</a>`
-- Solar flare classification: `<a href="https://earthsky.org/sun/solar-flares-classification-m-x-c-b-a/" target="_blank" rel="noopener">M-class flares</a>` (when discussing the classification system)
-- X-class flares: `<a href="https://earthsky.org/sun/x-flares-most-powerful-solar-flare/" target="_blank" rel="noopener">X-class [flare/flares/X#.#]</a>`
-- Coronal mass ejections: `<a href="https://earthsky.org/sun/what-are-coronal-mass-ejections/" target="_blank" rel="noopener">coronal mass ejection[s] (CME[s])</a>`
-- Coronal dimming: `<a href="https://en.wikipedia.org/wiki/Coronal_mass_ejection#Coronal_signatures" target="_blank" rel="noopener">coronal dimming</a>`
-- Solar wind: `<a href="https://www.swpc.noaa.gov/phenomena/solar-wind" target="_blank" rel="noopener">solar wind</a>`
-- Coronal holes: `<a href="https://www.swpc.noaa.gov/phenomena/coronal-holes" target="_blank" rel="noopener">coronal hole[s]</a>`
-
-## NOAA Scales and Products
-
-- NOAA R-scale (radio blackouts): `<a href="https://www.swpc.noaa.gov/noaa-scales-explanation" target="_blank" rel="noopener">R1/R2/R3/R4/R5</a>` with descriptor in parentheses
-- NOAA G-scale (geomagnetic storms): `<a href="https://www.swpc.noaa.gov/noaa-scales-explanation" target="_blank" rel="noopener">G1/G2/G3/G4/G5</a>` with descriptor in parentheses
-- Radio blackouts phenomenon: `<a href="https://www.swpc.noaa.gov/phenomena/solar-flares-radio-blackouts" target="_blank" rel="noopener">radio blackout[s]</a>`
-- Geomagnetic storms: `<a href="https://www.swpc.noaa.gov/phenomena/geomagnetic-storms" target="_blank" rel="noopener">geomagnetic storm[s]</a>`
-- Kp index: `<a href="https://www.swpc.noaa.gov/products/planetary-k-index" target="_blank" rel="noopener">Kp</a>`
-- SUVI instrument: `<a href="https://www.swpc.noaa.gov/products/goes-solar-ultraviolet-imager-suvi" target="_blank" rel="noopener">SUVI</a>`
-
-## Sunspot Classifications
-
-- Solar coordinates: `<a href="https://en.wikipedia.org/wiki/Solar_coordinate_systems" target="_blank" rel="noopener">[location like N24E53]</a>`
-- Magnetic classification: `<a href="https://www.spaceweatherlive.com/en/help/the-magnetic-classification-of-sunspots.html" target="_blank" rel="noopener">[alpha/beta/beta-gamma/beta-gamma-delta]</a>`
-- McIntosh classification: `<a href="https://www.spaceweatherlive.com/en/help/the-classification-of-sunspots-after-malde.html" target="_blank" rel="noopener">[Axx/Bxo/Cao/Dao/Ekc/etc.]</a>`
-
-## Interplanetary Medium
-
-- Interplanetary Magnetic Field: `<a href="https://www.spaceweatherlive.com/en/help/the-interplanetary-magnetic-field-imf.html" target="_blank" rel="noopener">interplanetary magnetic field (IMF)</a>`
-- Bz component: `<a href="https://icelandatnight.is/bz-level" target="_blank" rel="noopener">Bz</a>`
-
-## Spacecraft and Missions
-
-- Solar Dynamics Observatory: `<a href="https://sdo.gsfc.nasa.gov/" target="_blank" rel="noopener">SDO</a>` or `<a href="https://sdo.gsfc.nasa.gov/" target="_blank" rel="noopener">NASA/SDO</a>`
-- SOHO mission: `<a href="https://soho.nascom.nasa.gov/" target="_blank" rel="noopener">SOHO</a>` or `<a href="https://soho.nascom.nasa.gov/" target="_blank" rel="noopener">NASA/SOHO</a>`
-- GOES satellites: `<a href="https://www.nasa.gov/content/goes" target="_blank" rel="noopener">GOES-[#]</a>`
-
-## Special Resources
-
-- Radio burst data: `<a href="https://www.ncei.noaa.gov/products/space-weather/legacy-data/solar-radio-datasets" target="_blank" rel="noopener">[Type II/Type IV] radio burst</a>`
-- Solar cycle tracking: `<a href="https://www.swpc.noaa.gov/products/solar-cycle-progression" target="_blank" rel="noopener">Solar Cycle [#]</a>`
+$linking_block
 
 # FORMATTING REQUIREMENTS
 
@@ -828,321 +1067,921 @@ Before finalizing, verify:
 5. Ensure all links have target="_blank" rel="noopener"
 
 Generate the complete report now, following all requirements above.
-"""
-        return prompt
-
-    def _build_modular_prompt(self, data: Dict) -> str:
-        """
-        Build detailed prompt from modular YAML configuration files
+""")
 
-        This is the new modular approach that loads prompts from external files.
-        Eventually this will replace _build_detailed_prompt().
 
-        To use this method instead of the hardcoded one, set use_modular_prompts=True
-        in the config or environment.
-        """
-        try:
-            from prompt_config.prompt_loader import PromptConfigLoader
-            loader = PromptConfigLoader()
+# Flare mentions in DONKI CME notes, most specific first:
+# "M1.7 flare from Active Region 14274 (N27E27)", "M7.4 class flare from AR 14274 (N24E47)",
+# then the same two forms without a location
+_FLARE_NOTE_PATTERNS = (
+    re.compile(r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+(?:and\s+subsequent\s+eruption\s+)?from\s+Active\s+Region\s+(\d+)\s*\(([NS]\d+[EW]\d+)\)', re.IGNORECASE),
+    re.compile(r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+from\s+AR\s*(\d+)\s*\(([NS]\d+[EW]\d+)\)'),
+    re.compile(r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+(?:and\s+subsequent\s+eruption\s+)?from\s+Active\s+Region\s+(\d+)', re.IGNORECASE),
+    re.compile(r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+from\s+AR\s*(\d+)'),
+)
 
-            # Build prompt sections
-            prompt_parts = []
+# Section header above the appended data tables, and the note shown when there
+# is no flare or CME data for the period
+_DATA_TABLES_HEADER = """
 
-            # Header
-            prompt_parts.append("You are a professional space weather forecaster creating a daily report.")
-            prompt_parts.append("Use the data provided below to generate an engaging, accurate report.\n")
+<hr style="margin: 30px 0; border: none; border-top: 2px solid #bdc3c7;">
 
-            # Primary data sources
-            prompt_parts.append("# PRIMARY DATA SOURCES\n")
-            prompt_parts.append(f"## NOAA SWPC Discussion\n{data.get('noaa_discussion', 'Not available')}\n")
-            prompt_parts.append(f"## UK Met Office Space Weather Forecast\n{data.get('uk_met_office', 'Not available')}\n")
-            prompt_parts.append(f"## SIDC Forecast\n{data.get('sidc_forecast', 'Not available')}\n")
+<h2 style="color: #2c3e50; margin-top: 30px;">Detailed Activity Data</h2>
+"""
+_NO_DATA_TABLES_NOTE = """
+<div style="padding: 20px; background-color: #ecf0f1; border-radius: 5px; text-align: center;">
+<p style="margin: 0; color: #7f8c8d;"><em>No detailed flare or CME data available for this period.</em></p>
+</div>
+"""
 
-            # Flare data
-            if 'flares_detailed' in data:
-                prompt_parts.append(f"## 24-Hour Flare Tracking Database\n{self._format_flare_summary(data.get('flare_summary', {}))}\n")
+# Basic report used when no AI provider is available
+_FALLBACK_HTML_TEMPLATE = """<h3>Space Weather Report - {report_date} (UTC)</h3>
+<h4>(11 UTC {yesterday_date} → 11 UTC {now_date})</h4>
 
-            # CME data
-            if 'cmes_observed' in data:
-                prompt_parts.append(f"## CME Tracking Database (Enhanced with Analyses & Model Runs)\n{self._format_cme_data(data.get('cmes_observed', []))}\n")
+<p><em>Note: Full report generation requires AI API integration.</em></p>
 
-            if 'cmes_predicted' in data:
-                prompt_parts.append(f"## CME Arrival Predictions (Forecast Period)\n{self._format_cme_data(data.get('cmes_predicted', []))}\n")
+<h4>Data Status:</h4>
+<ul>
+  <li>NOAA SWPC Discussion: {noaa_status}</li>
+  <li>UK Met Office: {ukmo_status}</li>
+  <li>Alternative Sources: {alt_count} sources checked</li>
+</ul>
 
-            # Alternative sources
-            if data.get('alternative_sources'):
-                prompt_parts.append(f"## Alternative Sources\n{self._format_alternative_sources(data['alternative_sources'])}\n")
+<h4>To enable full reports:</h4>
+<ol>
+  <li>Get an API key from your AI provider (Anthropic, OpenAI, or Google)</li>
+  <li>Add to .env file: ANTHROPIC_API_KEY, OPENAI_API_KEY, or GOOGLE_API_KEY</li>
+  <li>Install: pip3 install anthropic openai google-generativeai python-dotenv</li>
+  <li>Re-run: python3 space_weather_automation.py</li>
+</ol>
+"""
 
-            # Report structure requirements
-            prompt_parts.append("# REPORT STRUCTURE AND REQUIREMENTS\n")
-            prompt_parts.append("## Header Section\n```html\n<h1>Space Weather Report — [Current Date]</h1>\n<p class=\"subtitle\">[Compelling headline]</p>\n```\n")
-            prompt_parts.append("**Top Story Paragraph**\nOpen with an engaging summary paragraph that captures the most significant space weather event or trend of the past 24 hours.\n")
-
-            # Editorial guidelines
-            prompt_parts.append(loader.build_editorial_guidelines_text())
-
-            # Detailed sections (keeping existing templates for now - can be modularized later)
-            prompt_parts.append("## Detailed Sections (in <ul> tags)\n")
-            prompt_parts.append("### 1. Flare Activity\n")
-            prompt_parts.append(loader.build_flare_analysis_text())
-
-            prompt_parts.append("\n### 3. Coronal Mass Ejections (CMEs)\n")
-            prompt_parts.append(loader.build_cme_analysis_text())
-            prompt_parts.append("\n" + loader.build_aurora_visibility_text())
-
-            # Writing style
-            prompt_parts.append("\n# WRITING STYLE REQUIREMENTS\n")
-            prompt_parts.append("1. **Tone:** Professional yet accessible\n")
-            prompt_parts.append("2. **Voice:** Active voice primarily\n")
-            prompt_parts.append("3. **Technical precision:** Use exact values\n")
-            prompt_parts.append("4. **Natural flow:** Coherent narrative\n")
-            prompt_parts.append("5. **Context:** Solar cycle context when relevant\n")
-            prompt_parts.append("6. **Accessible technicality:** Explain technical terms\n")
-            prompt_parts.append("7. **Geographic specificity:** Name actual locations\n")
-            prompt_parts.append("8. **Sentence variety:** Mix short and long sentences\n")
-            prompt_parts.append(loader.build_activity_language_text())
-
-            # Reference links
-            prompt_parts.append("\n" + loader.build_reference_links_text())
-
-            # Formatting requirements
-            prompt_parts.append("\n# FORMATTING REQUIREMENTS\n")
-            prompt_parts.append("## Bold Text (<strong> tags)\n")
-            prompt_parts.append("- Section labels: \"Solar activity:\", \"Sunspot regions:\", etc.\n")
-            prompt_parts.append("- Key metrics: \"X2.3\", \"Kp 7\", \"G3 (Strong)\"\n")
-            prompt_parts.append("## Links (see CRITICAL LINKING REQUIREMENTS above)\n")
-            prompt_parts.append("## Lists\n- Use <ul> and <li> tags\n- One event per list item\n- Include times in UTC\n")
-
-            # Output requirements
-            prompt_parts.append("\n# OUTPUT REQUIREMENTS\n")
-            prompt_parts.append("Generate ONLY the complete HTML report.\n")
-            prompt_parts.append("Do NOT include explanations, commentary, or meta-text.\n")
-            prompt_parts.append("Start directly with <h1>Space Weather Report...\n")
-            prompt_parts.append("\nGenerate the complete report now, following all requirements above.")
+# Flare table row backgrounds by class letter (light red, light orange; others white)
+_FLARE_ROW_COLORS = {'X': '#ffcccc', 'M': '#ffe6cc'}
 
-            return "\n\n".join(prompt_parts)
+def _cell(value) -> str:
+    """Escape a DONKI-supplied value for interpolation into table HTML"""
+    return escape(str(value))
 
-        except Exception as e:
-            # If modular loading fails, fall back to original method
-            print(f"Warning: Modular prompt loading failed ({e}), using hardcoded prompt")
-            return self._build_detailed_prompt(data)
 
-    def _format_flare_summary(self, flare_summary: Dict) -> str:
-        """Format flare summary from 24-hour tracking database with activity level guidance"""
-        import re
+# Data table rows, rendered once per flare/CME/model run. The row markup lives
+# in plain functions so each f-string is compiled with the module instead of a
+# format string being re-parsed per row. The table generators write rows to an
+# io.StringIO buffer rather than growing a str with +=, which is quadratic on
+# PyPy (it has no CPython-style in-place concatenation)
 
-        if not flare_summary or flare_summary.get('total_count', 0) == 0:
-            return "No flare data available from tracking database"
 
-        output = []
+def _flare_row(row_color, idx, flare_class, event_date, start_time, peak_time, end_time, region, location) -> str:
+    """One row of the flare table"""
+    return f"""    <tr style="background-color: {row_color};">
+      <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
+      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{flare_class}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{event_date}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{start_time}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{peak_time}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{end_time}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{region}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{location}</td>
+    </tr>
+"""
 
-        # Determine activity level based on strongest flare
-        strongest = flare_summary.get('strongest_flare')
-        activity_level = "low"
-        radio_blackout = None
 
-        if strongest:
-            flare_class = strongest['flare_class']
-            if flare_class.startswith('X'):
-                activity_level = "very high"
-                radio_blackout = "R3 (Strong)"
-            elif flare_class.startswith('M'):
-                # Extract magnitude
-                try:
-                    flare_mag = float(re.sub(r'[^0-9.]', '', flare_class[1:]))
-                    if flare_mag >= 5.0:
-                        activity_level = "high"
-                        radio_blackout = "R2 (Moderate)"
-                    else:
-                        activity_level = "moderate to high"
-                        radio_blackout = "R1 (Minor)"
-                except:
-                    activity_level = "moderate to high"
-                    radio_blackout = "R1 (Minor)"
-            elif flare_class.startswith('C'):
-                try:
-                    flare_mag = float(re.sub(r'[^0-9.]', '', flare_class[1:]))
-                    if flare_mag >= 5.0:
-                        activity_level = "moderate"
-                    else:
-                        activity_level = "low to moderate"
-                except:
-                    activity_level = "low to moderate"
+def _cme_row(impact_color, idx, start_time, cme_type, speed_str, direction, earth_impact, flare_str, alert_link) -> str:
+    """One row of the observed-CME table"""
+    return f"""    <tr style="background-color: {impact_color};">
+      <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{start_time}</td>
+      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{cme_type}-type</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{speed_str}</td>
+      <td style="padding: 8px; border: 1px solid #ddd;">{direction}</td>
+      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{earth_impact}</td>
+      <td style="padding: 8px; border: 1px solid #ddd; font-size: 0.85em;">{flare_str}</td>
+      <td style="padding: 8px; border: 1px solid #ddd; text-align: center;">{alert_link}</td>
+    </tr>
+"""
+
+
+# Static parts of the arrivals table
+_NO_ARRIVALS_HTML = """<div style="padding: 10px; background-color: #e8f5e9; border-radius: 5px;">
+<p><em>No CME arrivals predicted for the forecast period.</em></p>
+</div>"""
+_ARRIVALS_INTRO = """
+<h3>Predicted CME Arrivals - Forecast Period</h3>
+<p style="font-size: 0.9em; color: #555; margin-bottom: 15px;">
+Each CME may have multiple analysis types (LE=Leading Edge, SH=Shock) with multiple model runs per target.
+</p>
+"""
+_ARRIVALS_NOTE_FOOTER = """<p style="font-size: 0.85em; color: #777; font-style: italic;">
+Note: LE (Leading Edge) = bulk CME material, SH (Shock) = shock wave ahead of CME. Shock arrives first.
+</p>
+"""
+# Column headers repeated for every analysis in the arrivals table
+_ARRIVAL_TABLE_HEAD = """  <table style="width: 100%; border-collapse: collapse;">
+    <thead>
+      <tr style="background-color: #ecf0f1;">
+        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Run #</th>
+        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Target</th>
+        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Predicted Arrival</th>
+        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Kp Est.</th>
+        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Details</th>
+      </tr>
+    </thead>
+    <tbody>
+"""
+_ARRIVAL_TABLE_CLOSE = """    </tbody>
+  </table>
+"""
+
+
+def _earth_arrival_row(run_num, arrival_time, kp_str, details_str) -> str:
+    """One Earth arrival row of the CME arrivals table"""
+    return f"""      <tr style="background-color: #ffe6e6;">
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">{run_num}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">Earth</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">{arrival_time}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">{kp_str}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7; font-size: 0.85em;">{details_str}</td>
+      </tr>
+"""
+
+
+def _spacecraft_arrival_row(run_num, spacecraft_name, arrival_time) -> str:
+    """One spacecraft arrival row of the CME arrivals table"""
+    return f"""      <tr style="background-color: #fff9e6;">
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">{run_num}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">{spacecraft_name}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">{arrival_time}</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">—</td>
+        <td style="padding: 8px; border: 1px solid #bdc3c7;">—</td>
+      </tr>
+"""
+
+
+class AIReportGenerator:
+    """
+    Generate professional space weather reports using AI models.
+
+    Supports multiple providers (Anthropic Claude, OpenAI GPT, Google Gemini) through
+    a unified interface. Use the model_name parameter to select which
+    model to use for report generation.
+
+    Usage:
+        # Use default model (from config.yaml)
+        generator = AIReportGenerator()
+
+        # Use specific model
+        generator = AIReportGenerator(model_name="gpt-4o")
+
+        # Generate report
+        reports = generator.generate_report(data)
+
+        # Back-fill many reports concurrently
+        reports = asyncio.run(generator.batch_generate_report(datas))
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        use_modular_prompts: bool = False,
+        model_name: Optional[str] = None,
+        use_cache: bool = False,
+        similarity_threshold: float = 0.97
+    ):
+        """
+        Initialize the report generator
+
+        Args:
+            api_key: API key for the provider (uses environment variable if not provided)
+            use_modular_prompts: If True, use YAML-based modular prompts instead of hardcoded
+            model_name: Name of the model to use (e.g., "claude-sonnet-4.5", "gpt-4o")
+                       If None, uses default from config.yaml
+            use_cache: If True, reuse stored report narratives for identical/near-identical
+                       input data (also enabled by USE_REPORT_CACHE=true)
+            similarity_threshold: Minimum cosine similarity for a semantic cache hit
+        """
+        self.use_modular_prompts = use_modular_prompts or os.getenv('USE_MODULAR_PROMPTS', '').lower() == 'true'
+        self.model_name = model_name
+        self._provider = None
+        self._api_key = api_key
+
+        # API keys come from the environment unless passed explicitly
+        if api_key is None:
+            _load_dotenv()
+
+        # Try to initialize with model providers system
+        providers = _get_model_providers()
+        if providers:
+            try:
+                self._provider = _get_shared_provider(model_name, api_key)
+                self.enabled = True
+                self.model_name = self._provider.model_name
+                logger.info("Initialized with model provider: %s", self._provider)
+            except providers.ProviderError as e:
+                logger.warning("Could not initialize model provider: %s", e)
+                self._provider = None
+                self.enabled = False
+
+        # Fallback to legacy Anthropic-only mode
+        if self._provider is None:
+            self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+            anthropic_class = _get_anthropic() if self.api_key else None
+            if anthropic_class:
+                http_client = _get_shared_http_client()
+                if http_client is not None:
+                    self.client = anthropic_class(api_key=self.api_key, http_client=http_client)
+                else:
+                    self.client = anthropic_class(api_key=self.api_key)
+                self.enabled = True
+                self.model_name = "claude-sonnet-4.5"
+                logger.info("Initialized with legacy Anthropic client")
+            else:
+                self.client = None
+                self.enabled = False
+                logger.warning("No AI provider available - will use fallback templates")
+
+        # Report cache (only useful when an AI provider is generating reports)
+        self._cache = None
+        use_cache = use_cache or os.getenv('USE_REPORT_CACHE', '').lower() == 'true'
+        if use_cache and self.enabled:
+            try:
+                from report_cache import SemanticReportCache
+                self._cache = SemanticReportCache(similarity_threshold=similarity_threshold)
+            except Exception as e:
+                logger.warning("Could not initialize report cache: %s", e)
+
+        # Resolve the generation path once instead of branching on every report
+        if self._provider:
+            # Use new model providers system
+            self._generate_impl = self._generate_with_provider
+        elif self.enabled:
+            # Legacy Anthropic-only path
+            self._generate_impl = self._generate_with_legacy_client
+        else:
+            # No AI available: every report is the fallback template
+            self._generate_impl = None
+            self.generate_report = self._generate_fallback_report
+
+    @functools.cached_property
+    def provider_info(self) -> Dict:
+        """Get information about the current provider/model (computed once per instance)"""
+        if self._provider:
+            return self._provider.get_model_info()
+        elif hasattr(self, 'client') and self.client:
+            return {
+                'name': 'claude-sonnet-4.5',
+                'provider': 'anthropic',
+                'model_id': 'claude-sonnet-4-5-20250929',
+                'description': 'Legacy Anthropic client'
+            }
+        return {'name': 'fallback', 'provider': 'none', 'description': 'No AI provider'}
+
+    @staticmethod
+    def list_available_models() -> Dict:
+        """
+        List all available models that can be used for report generation
+
+        The listing is built once (and again only after a model is registered);
+        each call returns a fresh copy that callers may modify.
+
+        Returns:
+            Dictionary of model name -> model info
+        """
+        providers = _get_model_providers()
+        models = providers.list_available_models_serialized() if providers else _LEGACY_MODELS
+        return {name: dict(info) for name, info in models.items()}
+
+    def generate_report(self, data: Dict) -> Dict[str, str]:
+        """
+        Generate comprehensive space weather report using AI
+
+        Args:
+            data: Dictionary containing NOAA discussion and other source data
+
+        Returns:
+            Dictionary with report formats (html, markdown, json, text)
+        """
+        # Generators without an AI provider replace this method with
+        # _generate_fallback_report at init time
+        try:
+            return self._generate_report_uncaught(data)
+
+        except _api_error_types() as e:
+            logger.error("Error generating report: %s", e)
+            print(f"Error generating report with AI: {e}")
+            return self._generate_fallback_report(data)
+
+        except Exception as e:
+            logger.exception("Unexpected error generating report: %s", e)
+            print(f"Error generating report with AI: {e}")
+            return self._generate_fallback_report(data)
+
+    async def batch_generate_report(
+        self,
+        datas: List[Dict],
+        max_concurrency: int = 8,
+        use_batch_api: bool = False
+    ) -> List[Dict[str, str]]:
+        """
+        Generate reports for many data dictionaries (e.g. back-filling daily reports)
+
+        Reports are generated concurrently, with at most max_concurrency
+        requests in flight. A failure in one report does not affect the others;
+        failed items are returned as {'error': message}.
+
+        Args:
+            datas: List of data dictionaries, one per report
+            max_concurrency: Maximum number of concurrent provider calls
+            use_batch_api: If True and the provider supports it, submit all prompts
+                           through the provider's native (discounted) batch endpoint.
+                           Native batches may take minutes to hours to complete.
+
+        Returns:
+            List of report dictionaries (html, markdown, json, text) in input order
+        """
+        if not self.enabled:
+            return [self._generate_fallback_report(data) for data in datas]
+
+        if use_batch_api and self._provider and self._provider.SUPPORTS_BATCH:
+            return await asyncio.to_thread(self._batch_generate_native, datas)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate_one(data: Dict) -> Dict[str, str]:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(self._generate_report_uncaught, data)
+                except Exception as e:
+                    logger.error("Error generating batch report: %s", e, exc_info=True)
+                    return {'error': str(e)}
+
+        return list(await asyncio.gather(*(generate_one(data) for data in datas)))
+
+    def _batch_generate_native(self, datas: List[Dict]) -> List[Dict[str, str]]:
+        """Generate reports through the provider's native batch endpoint"""
+        results: List[Optional[Dict[str, str]]] = [None] * len(datas)
+        pending = []
+
+        for idx, data in enumerate(datas):
+            cached = self._cache.lookup(data) if self._cache else None
+            if cached is not None:
+                results[idx] = self._finalize_report(cached, data)
+            else:
+                pending.append((idx, data, self._build_prompt(data)))
+
+        if pending:
+            try:
+                responses = self._provider.batch_generate(
+                    [prompt for _, _, prompt in pending],
+                    max_tokens=REPORT_MAX_TOKENS,
+                    temperature=REPORT_TEMPERATURE
+                )
+            except _get_model_providers().ProviderError as e:
+                logger.error("Batch generation failed: %s", e)
+                responses = [None] * len(pending)
+
+            for (idx, data, _), response in zip(pending, responses):
+                if response is None:
+                    results[idx] = {'error': 'Batch submission failed'}
+                elif response.finish_reason == 'error':
+                    results[idx] = {'error': str(response.raw_response)}
+                else:
+                    html_report = self._extract_html(response.content)
+                    if self._cache:
+                        self._cache.store(data, html_report)
+                    results[idx] = self._finalize_report(html_report, data)
+
+        return results
+
+    def _generate_report_uncaught(self, data: Dict) -> Dict[str, str]:
+        """
+        Generate a report with the configured AI provider, letting errors propagate
+
+        Args:
+            data: Dictionary containing NOAA discussion and other source data
+
+        Returns:
+            Dictionary with report formats (html, markdown, json, text)
+        """
+        # Only the model's narrative is cached; tables and formats are rebuilt from current data
+        html_report = self._cache.lookup(data) if self._cache else None
+        if html_report is None:
+            prompt = self._build_prompt(data)
+            html_report = self._generate_with_retry(prompt)
+            if self._cache:
+                self._cache.store(data, html_report)
+
+        return self._finalize_report(html_report, data)
+
+    def _generate_with_retry(self, prompt: str) -> str:
+        """
+        Generate report content, retrying rate limits and timeouts with backoff
+
+        Args:
+            prompt: The complete prompt to send to the model
+
+        Returns:
+            HTML report content
+
+        Raises:
+            The last error once retries are exhausted, or any non-transient error
+        """
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                return self._generate_impl(prompt)
+            except Exception as e:
+                if attempt == RETRY_ATTEMPTS or not _is_transient_error(e):
+                    raise
+                delay = max(RETRY_MIN_WAIT, random.uniform(0, min(RETRY_MAX_WAIT, 2 ** attempt)))
+                logger.warning("Transient API error (attempt %d/%d), retrying in %.1fs: %s",
+                               attempt, RETRY_ATTEMPTS, delay, e)
+                time.sleep(delay)
+
+    def _build_prompt(self, data: Dict) -> str:
+        """Build comprehensive prompt (modular or hardcoded)"""
+        if self.use_modular_prompts:
+            return self._build_modular_prompt(data)
+        return self._build_detailed_prompt(data)
+
+    def _finalize_report(self, html_report: str, data: Dict) -> Dict[str, str]:
+        """Append data tables and build all output formats"""
+        # Append data tables after main report content
+        html_report = self._append_data_tables(html_report, data)
+
+        # Generate other formats
+        return self._build_outputs(html_report, data)
+
+    def _generate_with_provider(self, prompt: str) -> str:
+        """
+        Generate report content using the model providers system
+
+        Args:
+            prompt: The complete prompt to send to the model
+
+        Returns:
+            HTML report content
+        """
+        logger.info("Generating report with %s", self._provider.model_name)
+        return self._generate_with_continuation(self._stream_from_provider, prompt)
+
+    def _generate_with_legacy_client(self, prompt: str) -> str:
+        """
+        Generate report content using legacy Anthropic client
+
+        Args:
+            prompt: The complete prompt to send to Claude
+
+        Returns:
+            HTML report content
+        """
+        logger.info("Generating report with legacy Anthropic client")
+        return self._generate_with_continuation(self._stream_from_legacy_client, prompt)
+
+    @staticmethod
+    def _generate_with_continuation(stream_fn, prompt: str) -> str:
+        """
+        Run a generation, continuing it if the model stopped at REPORT_MAX_TOKENS
+
+        Args:
+            stream_fn: Callable taking a prompt and returning (content, finish_reason)
+            prompt: The complete prompt to send to the model
+
+        Returns:
+            HTML report content, including any continuations
+        """
+        content, finish_reason = stream_fn(prompt)
+        html = AIReportGenerator._strip_fences(content)
+
+        for _ in range(REPORT_MAX_CONTINUATIONS):
+            if finish_reason not in TRUNCATED_FINISH_REASONS:
+                break
+            logger.info("Report reached max_tokens, requesting continuation")
+            continuation_prompt = (
+                f"{prompt}\n\nYou already wrote the beginning of this report. "
+                f"Continue the report from where you left off, without repeating anything:\n\n"
+                f"{html[-CONTINUATION_TAIL_CHARS:]}"
+            )
+            more, finish_reason = stream_fn(continuation_prompt)
+            # A continuation may open its own code fence, so unwrap each piece before joining
+            html += AIReportGenerator._strip_fences(more)
+
+        return html.strip()
+
+    def _stream_from_provider(self, prompt: str):
+        """
+        Stream one completion from the configured provider
+
+        Returns:
+            Tuple of (content, finish_reason)
+        """
+        stream = self._provider.generate_stream(
+            prompt=prompt,
+            max_tokens=REPORT_MAX_TOKENS,
+            temperature=REPORT_TEMPERATURE
+        )
+        for chunk_count, _ in enumerate(stream, 1):
+            if chunk_count % STREAM_LOG_INTERVAL == 0:
+                logger.debug("Received %d chunks from %s", chunk_count, self._provider.model_name)
+        response = stream.response
+
+        logger.info(
+            "Report generated: %d tokens, finish_reason=%s",
+            response.output_tokens, response.finish_reason
+        )
+
+        return response.content, response.finish_reason
+
+    def _stream_from_legacy_client(self, prompt: str):
+        """
+        Stream one completion from the legacy Anthropic client
+
+        Returns:
+            Tuple of (content, stop_reason)
+        """
+        buffer = io.StringIO()
+        with self.client.messages.stream(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=REPORT_MAX_TOKENS,
+            temperature=REPORT_TEMPERATURE,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        ) as stream:
+            for chunk_count, text in enumerate(stream.text_stream, 1):
+                buffer.write(text)
+                if chunk_count % STREAM_LOG_INTERVAL == 0:
+                    logger.debug("Received %d chunks from legacy Anthropic client", chunk_count)
+            stop_reason = stream.get_final_message().stop_reason
+
+        return buffer.getvalue(), stop_reason
+    
+    def _build_detailed_prompt(self, data: Dict) -> str:
+        """Build detailed prompt with comprehensive instructions and examples"""
+        # Use UTC time for all dates, formatted once per report
+        now = datetime.now(timezone.utc)
+        now_long = now.strftime('%B %d, %Y')
+        now_short = now.strftime('%B %d')
+        yest_short = (now - timedelta(days=1)).strftime('%B %d')
+
+        # Gather and format the data sections
+        noaa = data.get('noaa_discussion', 'Not available')
+        ukmo = data.get('uk_met_office', 'Not available')
+        sidc = data.get('sidc_forecast', 'Not available')
+        flares = self._format_flare_summary(data.get('flare_summary'))
+        cmes_obs = self._format_cme_data(data.get('cmes_observed', []))
+        cmes_pred = self._format_cme_data(data.get('cmes_predicted', []))
+        alt = self._format_alternative_sources(data.get('alternative_sources', {}))
+
+        dates = {'report_date': now_long, 'now_date': now_short, 'yesterday_date': yest_short}
+
+        parts = [_PROMPT_HEADER_TEMPLATE.substitute(dates)]
+        for title, content in (
+            ('NOAA SWPC Discussion (Most Authoritative)', noaa),
+            ('UK Met Office Space Weather Forecast', ukmo),
+            ('SIDC (Solar Influences Data analysis Center) Forecast', sidc),
+            ('24-Hour Flare Tracking Database', flares),
+            ('CME Tracking Database (Enhanced with Analyses & Model Runs)', cmes_obs),
+            ('CME Arrival Predictions (Forecast Period)', cmes_pred),
+            ('Alternative Sources (For Context)', alt),
+        ):
+            parts.append(f"## {title}\n{content}\n\n")
+        parts.append(_detailed_prompt_instructions(now_short, yest_short))
+
+        return "".join(parts)
+
+    def _build_modular_prompt(self, data: Dict) -> str:
+        """
+        Build detailed prompt from modular YAML configuration files
+
+        This is the new modular approach that loads prompts from external files.
+        Eventually this will replace _build_detailed_prompt().
+
+        To use this method instead of the hardcoded one, set use_modular_prompts=True
+        in the config or environment.
+        """
+        try:
+            # Static instructions are built once; only the data sections vary per report.
+            # The first build does blocking YAML reads, so it runs on a worker thread
+            # while the data sections below are formatted.
+            static_future = None
+            if '_modular_prompt_static' not in self.__dict__:
+                executor = ThreadPoolExecutor(max_workers=1)
+                static_future = executor.submit(getattr, self, '_modular_prompt_static')
+                executor.shutdown(wait=False)
+
+            # Build prompt sections
+            prompt_parts = []
+
+            # Header
+            prompt_parts.append("You are a professional space weather forecaster creating a daily report.")
+            prompt_parts.append("Use the data provided below to generate an engaging, accurate report.\n")
+
+            # Primary data sources
+            prompt_parts.append("# PRIMARY DATA SOURCES\n")
+            prompt_parts.append(f"## NOAA SWPC Discussion\n{data.get('noaa_discussion', 'Not available')}\n")
+            prompt_parts.append(f"## UK Met Office Space Weather Forecast\n{data.get('uk_met_office', 'Not available')}\n")
+            prompt_parts.append(f"## SIDC Forecast\n{data.get('sidc_forecast', 'Not available')}\n")
+
+            # Flare data
+            if 'flares_detailed' in data:
+                prompt_parts.append(f"## 24-Hour Flare Tracking Database\n{self._format_flare_summary(data.get('flare_summary', {}))}\n")
+
+            # CME data
+            if 'cmes_observed' in data:
+                prompt_parts.append(f"## CME Tracking Database (Enhanced with Analyses & Model Runs)\n{self._format_cme_data(data.get('cmes_observed', []))}\n")
+
+            if 'cmes_predicted' in data:
+                prompt_parts.append(f"## CME Arrival Predictions (Forecast Period)\n{self._format_cme_data(data.get('cmes_predicted', []))}\n")
+
+            # Alternative sources
+            if data.get('alternative_sources'):
+                prompt_parts.append(f"## Alternative Sources\n{self._format_alternative_sources(data['alternative_sources'])}\n")
+
+            if static_future is not None:
+                static_future.result()
+            prompt_parts.append(self._modular_prompt_static)
+
+            return "\n\n".join(prompt_parts)
+
+        except Exception as e:
+            # If modular loading fails, fall back to original method
+            print(f"Warning: Modular prompt loading failed ({e}), using hardcoded prompt")
+            return self._build_detailed_prompt(data)
+
+    @functools.cached_property
+    def _modular_prompt_static(self) -> str:
+        """Report structure, style and formatting sections of the modular prompt (built once)"""
+        loader = _get_prompt_loader()
+
+        prompt_parts = []
+
+        # Report structure requirements
+        prompt_parts.append("# REPORT STRUCTURE AND REQUIREMENTS\n")
+        prompt_parts.append("## Header Section\n```html\n<h1>Space Weather Report — [Current Date]</h1>\n<p class=\"subtitle\">[Compelling headline]</p>\n```\n")
+        prompt_parts.append("**Top Story Paragraph**\nOpen with an engaging summary paragraph that captures the most significant space weather event or trend of the past 24 hours.\n")
+
+        # Editorial guidelines
+        prompt_parts.append(loader.build_editorial_guidelines_text())
+
+        # Detailed sections (keeping existing templates for now - can be modularized later)
+        prompt_parts.append("## Detailed Sections (in <ul> tags)\n")
+        prompt_parts.append("### 1. Flare Activity\n")
+        prompt_parts.append(loader.build_flare_analysis_text())
+
+        prompt_parts.append("\n### 3. Coronal Mass Ejections (CMEs)\n")
+        prompt_parts.append(loader.build_cme_analysis_text())
+        prompt_parts.append("\n" + loader.build_aurora_visibility_text())
+
+        # Writing style
+        prompt_parts.append("\n# WRITING STYLE REQUIREMENTS\n")
+        prompt_parts.append("1. **Tone:** Professional yet accessible\n")
+        prompt_parts.append("2. **Voice:** Active voice primarily\n")
+        prompt_parts.append("3. **Technical precision:** Use exact values\n")
+        prompt_parts.append("4. **Natural flow:** Coherent narrative\n")
+        prompt_parts.append("5. **Context:** Solar cycle context when relevant\n")
+        prompt_parts.append("6. **Accessible technicality:** Explain technical terms\n")
+        prompt_parts.append("7. **Geographic specificity:** Name actual locations\n")
+        prompt_parts.append("8. **Sentence variety:** Mix short and long sentences\n")
+        prompt_parts.append(loader.build_activity_language_text())
+
+        # Reference links
+        prompt_parts.append("\n" + loader.build_reference_links_text())
+
+        # Formatting requirements
+        prompt_parts.append("\n# FORMATTING REQUIREMENTS\n")
+        prompt_parts.append("## Bold Text (<strong> tags)\n")
+        prompt_parts.append("- Section labels: \"Solar activity:\", \"Sunspot regions:\", etc.\n")
+        prompt_parts.append("- Key metrics: \"X2.3\", \"Kp 7\", \"G3 (Strong)\"\n")
+        prompt_parts.append("## Links (see CRITICAL LINKING REQUIREMENTS above)\n")
+        prompt_parts.append("## Lists\n- Use <ul> and <li> tags\n- One event per list item\n- Include times in UTC\n")
+
+        # Output requirements
+        prompt_parts.append("\n# OUTPUT REQUIREMENTS\n")
+        prompt_parts.append("Generate ONLY the complete HTML report.\n")
+        prompt_parts.append("Do NOT include explanations, commentary, or meta-text.\n")
+        prompt_parts.append("Start directly with <h1>Space Weather Report...\n")
+        prompt_parts.append("\nGenerate the complete report now, following all requirements above.")
+
+        return "\n\n".join(prompt_parts)
+
+    def _format_flare_summary(self, flare_summary: Dict) -> str:
+        """Format flare summary from 24-hour tracking database with activity level guidance"""
+        if not flare_summary or flare_summary.get('total_count', 0) == 0:
+            return "No flare data available from tracking database"
+
+        # Lines are written newline-terminated; the final newline is dropped on return
+        buf = io.StringIO()
+        w = buf.write
+
+        # Determine activity level based on strongest flare
+        strongest = flare_summary.get('strongest_flare')
+        activity_level = "low"
+        radio_blackout = None
+
+        if strongest:
+            flare_class = strongest['flare_class']
+            tiers = _FLARE_ACTIVITY_TIERS.get(flare_class[:1])
+            if tiers:
+                magnitude = 0.0
+                if len(tiers) > 1:
+                    # Magnitude only matters for classes with more than one tier
+                    try:
+                        magnitude = float(_FLARE_MAGNITUDE_STRIP_RE.sub('', flare_class[1:]))
+                    except ValueError:
+                        pass
+                for threshold, activity_level, radio_blackout in tiers:
+                    if magnitude >= threshold:
+                        break
 
         # Add prominent activity level indicator
-        output.append(f"**🔴 ACTIVITY LEVEL: {activity_level.upper()} 🔴**")
-        output.append("")
-        output.append(f"**Rolling 24-Hour Flare Database Summary:**")
-        output.append(f"- Total flares tracked: {flare_summary['total_count']}")
-        output.append(f"- X-class: {flare_summary['x_class_count']}")
-        output.append(f"- M-class: {flare_summary['m_class_count']}")
-        output.append(f"- C-class: {flare_summary['c_class_count']}")
+        w(f"**🔴 ACTIVITY LEVEL: {activity_level.upper()} 🔴**\n"
+          "\n"
+          "**Rolling 24-Hour Flare Database Summary:**\n"
+          f"- Total flares tracked: {flare_summary['total_count']}\n"
+          f"- X-class: {flare_summary['x_class_count']}\n"
+          f"- M-class: {flare_summary['m_class_count']}\n"
+          f"- C-class: {flare_summary['c_class_count']}\n")
 
         # Enhanced strongest flare section
         if strongest:
-            output.append(f"\n**⚡ STRONGEST FLARE (USE THIS FOR YOUR HEADLINE) ⚡**")
-
             time_str = f"{strongest['event_date']} {strongest.get('event_time', '')}"
             region_str = f"AR{strongest.get('region', '????')}"
             location_str = strongest.get('location', 'unknown location')
 
-            output.append(f"- Flare class: **{strongest['flare_class']}**")
-            output.append(f"- Time: {time_str} UTC")
-            output.append(f"- Region: {region_str}")
-            output.append(f"- Location: {location_str}")
+            w("\n**⚡ STRONGEST FLARE (USE THIS FOR YOUR HEADLINE) ⚡**\n"
+              f"- Flare class: **{strongest['flare_class']}**\n"
+              f"- Time: {time_str} UTC\n"
+              f"- Region: {region_str}\n"
+              f"- Location: {location_str}\n")
 
             if radio_blackout:
-                output.append(f"- Radio blackout: **{radio_blackout}**")
+                w(f"- Radio blackout: **{radio_blackout}**\n")
 
             # Add source information
             source = strongest.get('raw_text', '')
             if 'LMSAL' in source:
-                output.append(f"- Data source: LMSAL (precise timing)")
+                w("- Data source: LMSAL (precise timing)\n")
             elif 'NOAA' in source:
-                output.append(f"- Data source: NOAA discussion")
+                w("- Data source: NOAA discussion\n")
 
-        # Sort flares by timestamp (newest first)
-        flares_list = sorted(
+        # Newest 20 flares by timestamp (partial sort; same order as a full reverse sort)
+        flares_list = heapq.nlargest(
+            20,
             flare_summary.get('flares_list', []),
-            key=lambda f: f.get('event_timestamp', 0),
-            reverse=True
+            key=lambda f: f.get('event_timestamp', 0)
         )
 
-        output.append("\n**Complete Flare List (Last 24 Hours, newest first):**")
-        for idx, flare in enumerate(flares_list[:20], 1):
+        if not flares_list:
+            return buf.getvalue()[:-1]
+
+        w("\n**Complete Flare List (Last 24 Hours, newest first):**\n")
+        for idx, flare in enumerate(flares_list, 1):
             time_str = f"{flare['event_date']} {flare['event_time']}" if flare.get('event_time') else flare['event_date']
             region_str = f"AR{flare['region']}" if flare.get('region') else "Unknown"
 
             # Mark M-class and X-class flares prominently
-            marker = ""
-            if flare['flare_class'].startswith('X'):
-                marker = " 🔴"
-            elif flare['flare_class'].startswith('M'):
-                marker = " 🟠"
+            marker = _FLARE_CLASS_MARKERS.get(flare['flare_class'][:1], "")
 
             # Add source label
             source = flare.get('raw_text', '')
             source_label = "[LMSAL]" if "LMSAL" in source else "[NOAA]"
 
-            output.append(f"{idx}. {flare['flare_class']}{marker} at {time_str} UTC from {region_str} {source_label}")
+            w(f"{idx}. {flare['flare_class']}{marker} at {time_str} UTC from {region_str} {source_label}\n")
 
-        return "\n".join(output)
+        return buf.getvalue()[:-1]
 
     def _format_alternative_sources(self, sources: Dict) -> str:
         """Format alternative sources for the prompt"""
-        if not sources:
+        if not sources or not any(sources.values()):
             return "No alternative sources available"
 
-        formatted = []
+        buf = io.StringIO()
         for name, content in sources.items():
             if content:
                 # Truncate long content
                 truncated = content[:1000] + "..." if len(content) > 1000 else content
-                formatted.append(f"### {name}\n{truncated}\n")
+                buf.write(f"### {name}\n{truncated}\n\n")
 
-        return "\n".join(formatted) if formatted else "No alternative sources available"
+        # Drop the separator after the last source
+        return buf.getvalue()[:-1] or "No alternative sources available"
 
     def _format_cme_data(self, cmes: list) -> str:
-        """Format CME data from enhanced tracker with all analyses and model runs"""
-        if not cmes or len(cmes) == 0:
-            return "No CME data available"
+        """
+        Format CME data from enhanced tracker with all analyses and model runs
 
-        output = []
-        output.append("**Enhanced CME Database (with Multiple Analyses & Model Runs):**")
-        output.append(f"- Total CMEs tracked: {len(cmes)}")
+        CMEs are listed in the order given; the tracker queries already return
+        them newest first, so no sorting is done here.
+        """
+        if not cmes:
+            return "No CME data available"
 
-        earth_impact_count = sum(1 for cme in cmes if any(
-            any(mr.get('earth_arrival_timestamp') for mr in analysis.get('model_runs', []))
-            for analysis in cme.get('analyses', [])
-        ))
-        output.append(f"- CMEs with Earth impact predictions: {earth_impact_count}")
-        output.append("")
+        # CME sections are written first so the Earth impact count is gathered in
+        # the same pass; lines are newline-terminated and the final one is dropped
+        body = io.StringIO()
+        w = body.write
+        earth_impact_count = 0
+        has_analyses = False
 
         for idx, cme in enumerate(cmes, 1):
-            output.append(f"**CME #{idx}: {cme['activity_id']}**")
-            output.append(f"- Start time: {cme['start_time']}")
-            output.append(f"- Source: {cme.get('source_location', 'Unknown')} (Region {cme.get('source_region', 'Unknown')})")
+            w(f"**CME #{idx}: {cme['activity_id']}**\n"
+              f"- Start time: {cme['start_time']}\n"
+              f"- Source: {cme.get('source_location', 'Unknown')} (Region {cme.get('source_region', 'Unknown')})\n")
 
             if cme.get('associated_flare'):
-                output.append(f"- Associated flare: {cme['associated_flare']}")
+                w(f"- Associated flare: {cme['associated_flare']}\n")
 
+            has_earth_impact = False
             analyses = cme.get('analyses', [])
             if analyses:
-                output.append(f"- Analyses: {len(analyses)} ({'LE' if any(a['analysis_type'] == 'LE' for a in analyses) else ''}{'+SH' if any(a['analysis_type'] == 'SH' for a in analyses) else ''})")
+                has_analyses = True
+                types = {a['analysis_type'] for a in analyses}
+                w(f"- Analyses: {len(analyses)} ({'LE' if 'LE' in types else ''}{'+SH' if 'SH' in types else ''})\n")
 
                 for analysis in analyses:
                     atype = analysis['analysis_type']
                     speed = analysis.get('speed', 'Unknown')
-                    output.append(f"  - **{atype} Analysis:** {speed} km/s")
+                    w(f"  - **{atype} Analysis:** {speed} km/s\n")
 
                     model_runs = analysis.get('model_runs', [])
                     if model_runs:
-                        earth_arrivals = [mr for mr in model_runs if mr.get('earth_arrival_time')]
+                        earth_arrivals = []
+                        for mr in model_runs:
+                            if mr.get('earth_arrival_timestamp'):
+                                has_earth_impact = True
+                            if mr.get('earth_arrival_time'):
+                                earth_arrivals.append(mr)
+
                         if earth_arrivals:
-                            output.append(f"    - Model runs with Earth impact: {len(earth_arrivals)}")
+                            w(f"    - Model runs with Earth impact: {len(earth_arrivals)}\n")
                             for mr in earth_arrivals:
-                                output.append(f"      - Run {mr.get('run_number')}: Arrival {mr.get('earth_arrival_time')}")
-                                if mr.get('kp_90'):
-                                    output.append(f"        Kp estimates: 90°={mr.get('kp_90')}, 135°={mr.get('kp_135')}, 180°={mr.get('kp_180')}")
-                                if mr.get('rmin_earth_radii'):
-                                    output.append(f"        Rmin: {mr.get('rmin_earth_radii')} Earth radii")
+                                # One write per run; optional lines collapse to ""
+                                kp_90 = mr.get('kp_90')
+                                rmin = mr.get('rmin_earth_radii')
+                                kp_line = f"        Kp estimates: 90°={kp_90}, 135°={mr.get('kp_135')}, 180°={mr.get('kp_180')}\n" if kp_90 else ""
+                                rmin_line = f"        Rmin: {rmin} Earth radii\n" if rmin else ""
+                                w(f"      - Run {mr.get('run_number')}: Arrival {mr.get('earth_arrival_time')}\n{kp_line}{rmin_line}")
                         else:
-                            output.append(f"    - Model runs: {len(model_runs)} (no Earth impacts predicted)")
-
-            output.append("")  # Blank line between CMEs
-
-        output.append("**IMPORTANT CME REPORTING INSTRUCTIONS:**")
-        output.append("- Show BOTH LE and SH analyses when both are present")
-        output.append("- Include ALL model run results for each analysis")
-        output.append("- Kp estimates indicate geomagnetic storm severity:")
-        output.append("  - Kp 4-5: Minor activity")
-        output.append("  - Kp 6-7: G1-G2 storms (moderate)")
-        output.append("  - Kp 8-9: G3-G4 storms (strong/severe)")
-        output.append("- Explain that SH (shock) arrives before LE (main material)")
-        output.append("- For multiple runs close together, show range (e.g., '03:17-03:22 UTC')")
-
-        return "\n".join(output)
+                            w(f"    - Model runs: {len(model_runs)} (no Earth impacts predicted)\n")
+
+            earth_impact_count += has_earth_impact
+            w("\n")  # Blank line between CMEs
+
+        buf = io.StringIO()
+        w = buf.write
+        w("**Enhanced CME Database (with Multiple Analyses & Model Runs):**\n"
+          f"- Total CMEs tracked: {len(cmes)}\n"
+          f"- CMEs with Earth impact predictions: {earth_impact_count}\n\n")
+        w(body.getvalue())
+
+        # The reporting instructions only concern analyses and model runs; without
+        # them, drop the blank line after the last CME as well
+        if not has_analyses:
+            return buf.getvalue()[:-2]
+
+        w("**IMPORTANT CME REPORTING INSTRUCTIONS:**\n"
+          "- Show BOTH LE and SH analyses when both are present\n"
+          "- Include ALL model run results for each analysis\n"
+          "- Kp estimates indicate geomagnetic storm severity:\n"
+          "  - Kp 4-5: Minor activity\n"
+          "  - Kp 6-7: G1-G2 storms (moderate)\n"
+          "  - Kp 8-9: G3-G4 storms (strong/severe)\n"
+          "- Explain that SH (shock) arrives before LE (main material)\n"
+          "- For multiple runs close together, show range (e.g., '03:17-03:22 UTC')\n")
+
+        return buf.getvalue()[:-1]
 
     def _extract_html(self, content: str) -> str:
         """Extract HTML from AI model's response"""
-        # Remove markdown code blocks if present
-        if '```html' in content:
-            content = content.split('```html')[1].split('```')[0]
-        elif '```' in content:
-            content = content.split('```')[1].split('```')[0]
-        
-        return content.strip()
+        return self._strip_fences(content).strip()
+
+    @staticmethod
+    def _strip_fences(content: str) -> str:
+        """Body of the first markdown code block in a response, or the whole response if unfenced"""
+        # Slice between fence positions so only the extracted block is copied;
+        # surrounding whitespace is kept so continuation pieces join seamlessly
+        start = content.find('```html')
+        if start != -1:
+            start += 7
+        else:
+            start = content.find('```')
+            if start == -1:
+                return content
+            start += 3
+
+        end = content.find('```', start)
+        return content[start:end if end != -1 else None]
     
     def _convert_to_markdown(self, html: str) -> str:
         """Convert HTML report to Markdown"""
-        import re
-        
-        md = html
-        # Convert headers
-        md = re.sub(r'<h3>(.*?)</h3>', r'## \1', md)
-        md = re.sub(r'<h4>(.*?)</h4>', r'### \1', md)
-        
-        # Convert formatting
-        md = re.sub(r'<strong>(.*?)</strong>', r'**\1**', md)
-        md = re.sub(r'<em>(.*?)</em>', r'*\1*', md)
-        
-        # Convert lists
-        md = md.replace('<ul>', '')
-        md = md.replace('</ul>', '')
-        md = re.sub(r'<li>(.*?)</li>', r'- \1', md, flags=re.DOTALL)
-        
-        # Convert links
-        md = re.sub(r'<a href="(.*?)"[^>]*>(.*?)</a>', r'[\2](\1)', md)
-        
+        md = _MarkdownConverter().convert(html)
+
         # Clean up extra whitespace
-        md = re.sub(r'\n\s*\n', '\n\n', md)
+        md = _WS_RE.sub('\n\n', md)
         
         return md.strip()
     
     def _convert_to_json(self, data: Dict) -> str:
         """Convert data to JSON format"""
-        import json
-        from datetime import timezone
         output = {
             'timestamp': datetime.now(timezone.utc).isoformat(),
             'sources': {
@@ -1153,25 +1992,40 @@ Generate the complete report now, following all requirements above.
             },
             'raw_data': data
         }
-        return json.dumps(output, indent=2)
+        return _json_dumps(output)
     
     def _convert_to_text(self, html: str) -> str:
         """Convert HTML to plain text"""
-        import re
-        
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', html)
-        
+        text = _strip_tags(html)
+
         # Decode HTML entities
-        text = text.replace('→', '->')
-        text = text.replace('&nbsp;', ' ')
-        
-        # Clean up extra whitespace
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        text = re.sub(r'  +', ' ', text)
-        
+        text = text.replace('→', '->').replace('&nbsp;', ' ')
+
+        # Clean up extra whitespace (blank lines and runs of spaces) in a second pass,
+        # since removed tags and decoded entities can leave new runs behind
+        text = _TEXT_WS_RE.sub(_replace_text_ws, text)
+
         return text.strip()
     
+    def _build_outputs(self, html_report: str, data: Dict) -> Dict[str, str]:
+        """
+        Convert the final HTML report to the other formats
+
+        Args:
+            html_report: Complete HTML report (with data tables appended)
+            data: Data dictionary used for the JSON output
+
+        Returns:
+            Dictionary with report formats (html, markdown, json, text)
+        """
+        return {
+            'html': html_report,
+            'markdown': self._convert_to_markdown(html_report),
+            'json': self._convert_to_json(data),
+            'text': self._convert_to_text(html_report)
+        }
+
     def _append_data_tables(self, html_report: str, data: Dict) -> str:
         """
         Append flare and CME data tables to the main report
@@ -1183,75 +2037,97 @@ Generate the complete report now, following all requirements above.
         Returns:
             Complete HTML report with data tables appended
         """
-        # Add separator before data tables
-        tables_html = """
+        flares = data.get('flares_detailed', [])
+        cmes = data.get('cmes_observed', [])
+        arrivals = data.get('cmes_predicted', [])
 
-<hr style="margin: 30px 0; border: none; border-top: 2px solid #bdc3c7;">
+        # If no data at all, add a note under the section header
+        if not (flares or cmes or arrivals):
+            return html_report + _DATA_TABLES_HEADER + _NO_DATA_TABLES_NOTE
 
-<h2 style="color: #2c3e50; margin-top: 30px;">Detailed Activity Data</h2>
-"""
+        # Add separator before data tables
+        parts = [html_report, _DATA_TABLES_HEADER]
 
         # Add flares table
-        flares = data.get('flares_detailed', [])
         if flares:
-            tables_html += "\n" + self.generate_flares_html_table(flares)
+            parts.extend(("\n", self.generate_flares_html_table(flares)))
 
         # Add observed CMEs table
-        cmes = data.get('cmes_observed', [])
         if cmes:
-            tables_html += "\n" + self.generate_cmes_observed_html_table(cmes)
+            parts.extend(("\n", self.generate_cmes_observed_html_table(cmes)))
 
         # Add predicted CME arrivals table
-        arrivals = data.get('cmes_predicted', [])
         if arrivals:
-            tables_html += "\n" + self.generate_cme_arrivals_html_table(arrivals)
-
-        # If no data at all, add a note
-        if not flares and not cmes and not arrivals:
-            tables_html += """
-<div style="padding: 20px; background-color: #ecf0f1; border-radius: 5px; text-align: center;">
-<p style="margin: 0; color: #7f8c8d;"><em>No detailed flare or CME data available for this period.</em></p>
-</div>
-"""
+            parts.extend(("\n", self.generate_cme_arrivals_html_table(arrivals)))
 
-        return html_report + tables_html
+        return "".join(parts)
 
     def _generate_fallback_report(self, data: Dict) -> Dict[str, str]:
         """Generate basic template when AI API is not available"""
-        from datetime import timezone
+        cache_path = self._fallback_cache_path(data)
+        try:
+            reports = json.loads(cache_path.read_text(encoding='utf-8'))
+            os.utime(cache_path)  # Mark as recently used
+            # The JSON output embeds this run's raw data, so it is never taken from the cache
+            reports['json'] = self._convert_to_json(data)
+            return reports
+        except (OSError, ValueError):
+            pass
+
         now = datetime.now(timezone.utc)
         yesterday = now - timedelta(days=1)
 
-        html = f"""<h3>Space Weather Report - {now.strftime('%B %d, %Y')} (UTC)</h3>
-<h4>(11 UTC {yesterday.strftime('%B %d')} → 11 UTC {now.strftime('%B %d')})</h4>
+        html = _FALLBACK_HTML_TEMPLATE.format(
+            report_date=now.strftime('%B %d, %Y'),
+            yesterday_date=yesterday.strftime('%B %d'),
+            now_date=now.strftime('%B %d'),
+            noaa_status='✓ Available' if data.get('noaa_discussion') else '✗ Not available',
+            ukmo_status='✓ Available' if data.get('uk_met_office') else '✗ Not available',
+            alt_count=len(data.get('alternative_sources', {}))
+        )
 
-<p><em>Note: Full report generation requires AI API integration.</em></p>
+        # Append data tables even in fallback mode
+        html = self._append_data_tables(html, data)
 
-<h4>Data Status:</h4>
-<ul>
-  <li>NOAA SWPC Discussion: {'✓ Available' if data.get('noaa_discussion') else '✗ Not available'}</li>
-  <li>UK Met Office: {'✓ Available' if data.get('uk_met_office') else '✗ Not available'}</li>
-  <li>Alternative Sources: {len(data.get('alternative_sources', {}))} sources checked</li>
-</ul>
+        reports = self._build_outputs(html, data)
+        self._store_fallback_report(cache_path, reports)
+        return reports
 
-<h4>To enable full reports:</h4>
-<ol>
-  <li>Get an API key from your AI provider (Anthropic, OpenAI, or Google)</li>
-  <li>Add to .env file: ANTHROPIC_API_KEY, OPENAI_API_KEY, or GOOGLE_API_KEY</li>
-  <li>Install: pip3 install anthropic openai google-generativeai python-dotenv</li>
-  <li>Re-run: python3 space_weather_automation.py</li>
-</ol>
-"""
+    @staticmethod
+    def _fallback_cache_path(data: Dict) -> Path:
+        """
+        Disk cache location for the fallback report of this input (and UTC day)
 
-        # Append data tables even in fallback mode
-        html = self._append_data_tables(html, data)
+        Keyed only on what the template and data tables render; the run
+        timestamps in data change on every run and would never repeat.
+        """
+        payload = json.dumps(
+            {
+                'date': datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+                'noaa': bool(data.get('noaa_discussion')),
+                'ukmo': bool(data.get('uk_met_office')),
+                'alt_count': len(data.get('alternative_sources', {})),
+                **{field: data.get(field) for field in FALLBACK_TABLE_FIELDS}
+            },
+            sort_keys=True, default=str
+        )
+        return FALLBACK_CACHE_DIR / f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.json"
 
-        return {
-            'html': html,
-            'markdown': self._convert_to_markdown(html),
-            'json': self._convert_to_json(data),
-            'text': self._convert_to_text(html)
-        }
+    @staticmethod
+    def _store_fallback_report(cache_path: Path, reports: Dict[str, str]):
+        """Write a fallback report to the disk cache, evicting least recently used entries"""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps({fmt: text for fmt, text in reports.items() if fmt != 'json'}),
+                                encoding='utf-8')
+            tmp_path.replace(cache_path)
+
+            entries = sorted(cache_path.parent.glob('*.json'), key=lambda p: p.stat().st_mtime)
+            for stale in entries[:-FALLBACK_CACHE_MAX_ENTRIES]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning("Could not cache fallback report: %s", e)
 
     @staticmethod
     def generate_flares_html_table(flares: list) -> str:
@@ -1264,12 +2140,14 @@ Generate the complete report now, following all requirements above.
         Returns:
             HTML table string
         """
-        if not flares or len(flares) == 0:
+        if not flares:
             return """<div style="padding: 10px; background-color: #f0f0f0; border-radius: 5px;">
 <p><em>No flare data available for this period.</em></p>
 </div>"""
 
-        html = """
+        buf = io.StringIO()
+        w = buf.write
+        w("""
 <h3>Solar Flares - Analysis Period</h3>
 <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
   <thead>
@@ -1285,10 +2163,14 @@ Generate the complete report now, following all requirements above.
     </tr>
   </thead>
   <tbody>
-"""
+""")
 
+        class_counts = {}
         for idx, flare in enumerate(flares, start=1):
-            flare_class = flare.get('flare_class', 'Unknown')
+            # A NULL class from the database would otherwise break the letter lookup
+            flare_class = flare.get('flare_class') or 'Unknown'
+            class_letter = flare_class[:1]
+            class_counts[class_letter] = class_counts.get(class_letter, 0) + 1
             event_date = flare.get('event_date', '')
             start_time = flare.get('event_time', '')
             peak_time = flare.get('peak_time', '')
@@ -1297,41 +2179,26 @@ Generate the complete report now, following all requirements above.
             location = flare.get('location', '')
 
             # Color code by flare class
-            if flare_class.startswith('X'):
-                row_color = '#ffcccc'  # Light red
-            elif flare_class.startswith('M'):
-                row_color = '#ffe6cc'  # Light orange
-            else:
-                row_color = '#ffffff'  # White
+            row_color = _FLARE_ROW_COLORS.get(class_letter, '#ffffff')
 
-            html += f"""    <tr style="background-color: {row_color};">
-      <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
-      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{flare_class}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{event_date}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{start_time}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{peak_time}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{end_time}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{region}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{location}</td>
-    </tr>
-"""
+            w(_flare_row(
+                row_color=row_color, idx=idx, flare_class=flare_class, event_date=event_date,
+                start_time=start_time, peak_time=peak_time, end_time=end_time,
+                region=region, location=location
+            ))
 
-        html += """  </tbody>
+        w("""  </tbody>
 </table>
-"""
-
-        # Add summary
-        x_count = sum(1 for f in flares if f.get('flare_class', '').startswith('X'))
-        m_count = sum(1 for f in flares if f.get('flare_class', '').startswith('M'))
-        c_count = sum(1 for f in flares if f.get('flare_class', '').startswith('C'))
+""")
 
-        html += f"""<p style="margin-top: 10px; font-size: 0.9em; color: #555;">
+        # Add summary (class counts were gathered in the row loop)
+        w(f"""<p style="margin-top: 10px; font-size: 0.9em; color: #555;">
 <strong>Summary:</strong> {len(flares)} total flares |
-X-class: {x_count} | M-class: {m_count} | C-class: {c_count}
+X-class: {class_counts.get('X', 0)} | M-class: {class_counts.get('M', 0)} | C-class: {class_counts.get('C', 0)}
 </p>
-"""
+""")
 
-        return html
+        return buf.getvalue()
 
     @staticmethod
     def generate_cmes_observed_html_table(cmes: list) -> str:
@@ -1345,12 +2212,14 @@ X-class: {x_count} | M-class: {m_count} | C-class: {c_count}
         Returns:
             HTML table string
         """
-        if not cmes or len(cmes) == 0:
+        if not cmes:
             return """<div style="padding: 10px; background-color: #f0f0f0; border-radius: 5px;">
 <p><em>No CME data available for this period.</em></p>
 </div>"""
 
-        html = """
+        buf = io.StringIO()
+        w = buf.write
+        w("""
 <h3>Coronal Mass Ejections (CMEs) - Analysis Period</h3>
 <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
   <thead>
@@ -1366,60 +2235,56 @@ X-class: {x_count} | M-class: {m_count} | C-class: {c_count}
     </tr>
   </thead>
   <tbody>
-"""
+""")
 
         earth_impact_count = 0
 
         for idx, cme in enumerate(cmes, start=1):
-            start_time = cme.get('start_time', '')
-            associated_flare = cme.get('associated_flare', '')
-            donki_url = cme.get('donki_url', '')
+            cme_get = cme.get
+            start_time = _cell(cme_get('start_time', ''))
+            associated_flare = _cell(cme_get('associated_flare', '') or '')
+            donki_url = _cell(cme_get('donki_url', '') or '')
 
             # Get analyses (LE and/or SH)
-            analyses = cme.get('analyses', [])
+            analyses = cme_get('analyses', [])
+            multiple_analyses = len(analyses) > 1
 
-            # Check if CME has Earth impacts across all analyses
-            has_earth_impact = any(
-                any(mr.get('earth_arrival_timestamp') for mr in analysis.get('model_runs', []))
-                for analysis in analyses
-            )
+            # Single pass over the analyses: Earth impacts, the primary analysis
+            # (prefer LE, fall back to the first) and per-analysis speeds
+            has_earth_impact = False
+            primary_analysis = None
+            speeds = []
+            for analysis in analyses:
+                analysis_get = analysis.get
+                if primary_analysis is None and analysis_get('analysis_type') == 'LE':
+                    primary_analysis = analysis
+                if multiple_analyses and analysis_get('speed'):
+                    speeds.append(f"{analysis['analysis_type']}: {int(analysis['speed'])}")
+                if not has_earth_impact:
+                    for mr in analysis_get('model_runs', []):
+                        if mr.get('earth_arrival_timestamp'):
+                            has_earth_impact = True
+                            break
 
             if has_earth_impact:
                 earth_impact_count += 1
 
-            # Get primary analysis (prefer LE, fall back to SH)
-            primary_analysis = None
-            for analysis in analyses:
-                if analysis.get('analysis_type') == 'LE':
-                    primary_analysis = analysis
-                    break
             if not primary_analysis and analyses:
                 primary_analysis = analyses[0]
 
-            # Extract fields from primary analysis
+            # Extract fields from primary analysis, formatting the direction
+            # only when both coordinates are known
+            cme_type, speed, direction = '?', None, "—"
             if primary_analysis:
-                cme_type = primary_analysis.get('type', '?')
-                speed = primary_analysis.get('speed')
-                direction_lon = primary_analysis.get('direction_lon')
-                direction_lat = primary_analysis.get('direction_lat')
-            else:
-                cme_type = '?'
-                speed = None
-                direction_lon = None
-                direction_lat = None
-
-            # Format direction
-            if direction_lon is not None and direction_lat is not None:
-                direction = f"{int(direction_lon)}° / {int(direction_lat)}°"
-            else:
-                direction = "—"
+                primary_get = primary_analysis.get
+                cme_type = _cell(primary_get('type', '?'))
+                speed = primary_get('speed')
+                lon_lat = (primary_get('direction_lon'), primary_get('direction_lat'))
+                if None not in lon_lat:
+                    direction = f"{int(lon_lat[0])}° / {int(lon_lat[1])}°"
 
             # Format speed (show LE/SH if both available)
-            if len(analyses) > 1:
-                speeds = []
-                for analysis in analyses:
-                    if analysis.get('speed'):
-                        speeds.append(f"{analysis['analysis_type']}: {int(analysis['speed'])}")
+            if multiple_analyses:
                 speed_str = " / ".join(speeds) + " km/s" if speeds else "—"
             elif speed:
                 speed_str = f"{int(speed)} km/s"
@@ -1436,30 +2301,24 @@ X-class: {x_count} | M-class: {m_count} | C-class: {c_count}
             # NASA DONKI link
             alert_link = f'<a href="{donki_url}" target="_blank" rel="noopener">View</a>' if donki_url else "—"
 
-            html += f"""    <tr style="background-color: {impact_color};">
-      <td style="padding: 8px; border: 1px solid #ddd;">{idx}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{start_time}</td>
-      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{cme_type}-type</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{speed_str}</td>
-      <td style="padding: 8px; border: 1px solid #ddd;">{direction}</td>
-      <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{earth_impact}</td>
-      <td style="padding: 8px; border: 1px solid #ddd; font-size: 0.85em;">{flare_str}</td>
-      <td style="padding: 8px; border: 1px solid #ddd; text-align: center;">{alert_link}</td>
-    </tr>
-"""
+            w(_cme_row(
+                impact_color=impact_color, idx=idx, start_time=start_time, cme_type=cme_type,
+                speed_str=speed_str, direction=direction, earth_impact=earth_impact,
+                flare_str=flare_str, alert_link=alert_link
+            ))
 
-        html += """  </tbody>
+        w("""  </tbody>
 </table>
-"""
+""")
 
         # Add summary
-        html += f"""<p style="margin-top: 10px; font-size: 0.9em; color: #555;">
+        w(f"""<p style="margin-top: 10px; font-size: 0.9em; color: #555;">
 <strong>Summary:</strong> {len(cmes)} CME(s) observed |
 Earth-directed: {earth_impact_count} | Multi-CME notifications: 0
 </p>
-"""
+""")
 
-        return html
+        return buf.getvalue()
 
     @staticmethod
     def _extract_flare_details_from_note(note: str) -> str:
@@ -1473,50 +2332,17 @@ Earth-directed: {earth_impact_count} | Multi-CME notifications: 0
 
         Returns: "M7.4 from AR14274 (N24E47)"
         """
-        import re
-
         if not note:
             return ""
 
-        # Pattern 1: "flare from Active Region XXXXX (location)"
-        # Example: "M1.7 flare from Active Region 14274 (N27E27)"
-        pattern1 = r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+(?:and\s+subsequent\s+eruption\s+)?from\s+Active\s+Region\s+(\d+)\s*\(([NS]\d+[EW]\d+)\)'
-        match1 = re.search(pattern1, note, re.IGNORECASE)
-
-        if match1:
-            flare_class = match1.group(1)
-            region = match1.group(2)
-            location = match1.group(3)
-            return f"{flare_class} from AR{region} ({location})"
-
-        # Pattern 2: "flare from AR XXXXX (location)" (abbreviated form)
-        # Example: "M7.4 class flare from AR 14274 (N24E47)"
-        pattern2 = r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+from\s+AR\s*(\d+)\s*\(([NS]\d+[EW]\d+)\)'
-        match2 = re.search(pattern2, note)
-
-        if match2:
-            flare_class = match2.group(1)
-            region = match2.group(2)
-            location = match2.group(3)
-            return f"{flare_class} from AR{region} ({location})"
-
-        # Pattern 3: "flare from Active Region XXXXX" (no location)
-        pattern3 = r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+(?:and\s+subsequent\s+eruption\s+)?from\s+Active\s+Region\s+(\d+)'
-        match3 = re.search(pattern3, note, re.IGNORECASE)
-
-        if match3:
-            flare_class = match3.group(1)
-            region = match3.group(2)
-            return f"{flare_class} from AR{region}"
-
-        # Pattern 4: "flare from AR XXXXX" (no location, abbreviated)
-        pattern4 = r'([CBMX]\d+\.\d+)\s+(?:class\s+)?flare\s+from\s+AR\s*(\d+)'
-        match4 = re.search(pattern4, note)
-
-        if match4:
-            flare_class = match4.group(1)
-            region = match4.group(2)
-            return f"{flare_class} from AR{region}"
+        # Patterns are tried in priority order, so a mention with a location wins
+        for pattern in _FLARE_NOTE_PATTERNS:
+            match = pattern.search(note)
+            if match:
+                flare_class, region, *location = match.groups()
+                if location:
+                    return f"{flare_class} from AR{region} ({location[0]})"
+                return f"{flare_class} from AR{region}"
 
         return ""
 
@@ -1535,179 +2361,147 @@ Earth-directed: {earth_impact_count} | Multi-CME notifications: 0
         Returns:
             HTML string with organized CME arrival predictions
         """
-        if not arrivals or len(arrivals) == 0:
-            return """<div style="padding: 10px; background-color: #e8f5e9; border-radius: 5px;">
-<p><em>No CME arrivals predicted for the forecast period.</em></p>
-</div>"""
+        if not arrivals:
+            return _NO_ARRIVALS_HTML
 
-        html = """
-<h3>Predicted CME Arrivals - Forecast Period</h3>
-<p style="font-size: 0.9em; color: #555; margin-bottom: 15px;">
-Each CME may have multiple analysis types (LE=Leading Edge, SH=Shock) with multiple model runs per target.
-</p>
-"""
+        buf = io.StringIO()
+        w = buf.write
+        w(_ARRIVALS_INTRO)
 
         cme_num = 0
         total_earth_arrivals = 0
         total_spacecraft_arrivals = 0
 
         for cme in arrivals:
-            cme_num += 1
-            start_time = cme.get('start_time', '')
-            activity_id = cme.get('activity_id', '')
-            donki_url = cme.get('donki_url', '')
-            associated_flare = cme.get('associated_flare', '')
+            cme_get = cme.get
+
+            # Collect each analysis's Earth and spacecraft arrivals first, so CMEs
+            # with no predictions at all can be skipped before writing anything
+            analysis_blocks = []
+            for analysis in cme_get('analyses', ()):
+                analysis_get = analysis.get
+                analysis_type = _cell(analysis_get('analysis_type', 'LE'))
+                speed = analysis_get('speed')
+                speed_str = f"{int(speed)} km/s" if speed else "Unknown"
 
-            # Count arrivals for this CME
-            analyses = cme.get('analyses', [])
-            cme_earth_count = 0
-            cme_spacecraft_count = 0
+                model_runs = analysis_get('model_runs', ())
 
-            for analysis in analyses:
-                model_runs = analysis.get('model_runs', [])
+                earth_runs = []
+                spacecraft_runs = []
                 for mr in model_runs:
-                    if mr.get('earth_arrival_timestamp'):
-                        cme_earth_count += 1
-                    spacecraft_impacts = mr.get('spacecraft_impacts', [])
-                    for impact in spacecraft_impacts:
+                    mr_get = mr.get
+                    if mr_get('earth_arrival_timestamp'):
+                        earth_runs.append(mr)
+                    for impact in mr_get('spacecraft_impacts', ()):
                         if impact.get('spacecraft_name', '').lower() != 'earth':
-                            cme_spacecraft_count += 1
+                            spacecraft_runs.append((mr, impact))
 
-            total_earth_arrivals += cme_earth_count
-            total_spacecraft_arrivals += cme_spacecraft_count
+                if earth_runs or spacecraft_runs:
+                    analysis_blocks.append((analysis_type, speed_str, earth_runs, spacecraft_runs))
 
-            # CME header section
-            html += f"""
-<div style="margin-bottom: 20px; border: 2px solid #2c3e50; border-radius: 8px; overflow: hidden;">
-  <div style="background-color: #34495e; color: white; padding: 12px;">
-    <h4 style="margin: 0; font-size: 1.1em;">CME #{cme_num}: {activity_id}</h4>
-    <p style="margin: 5px 0 0 0; font-size: 0.9em;">
-      Start: {start_time}"""
+            if not analysis_blocks:
+                continue  # Skip CMEs with no predictions
 
+            cme_num += 1
+            start_time = _cell(cme_get('start_time', ''))
+            activity_id = _cell(cme_get('activity_id', ''))
+            donki_url = _cell(cme_get('donki_url', ''))
+            associated_flare = cme_get('associated_flare', '')
+
+            flare_html = ''
             if associated_flare:
+                associated_flare = _cell(associated_flare)
                 # Extract flare details from note
-                note = cme.get('note', '')
-                flare_details = AIReportGenerator._extract_flare_details_from_note(note)
+                note = cme_get('note', '')
+                flare_details = _cell(AIReportGenerator._extract_flare_details_from_note(note))
 
                 if flare_details:
-                    html += f""" | <strong>Associated Flare: {associated_flare} ({flare_details})</strong>"""
+                    flare_html = f" | <strong>Associated Flare: {associated_flare} ({flare_details})</strong>"
                 else:
-                    html += f""" | <strong>Associated Flare: {associated_flare}</strong>"""
+                    flare_html = f" | <strong>Associated Flare: {associated_flare}</strong>"
 
-            html += f"""
+            # CME header section
+            w(f"""
+<div style="margin-bottom: 20px; border: 2px solid #2c3e50; border-radius: 8px; overflow: hidden;">
+  <div style="background-color: #34495e; color: white; padding: 12px;">
+    <h4 style="margin: 0; font-size: 1.1em;">CME #{cme_num}: {activity_id}</h4>
+    <p style="margin: 5px 0 0 0; font-size: 0.9em;">
+      Start: {start_time}{flare_html}
       | <a href="{donki_url}" target="_blank" rel="noopener" style="color: #3498db;">NASA DONKI Alert</a>
     </p>
   </div>
-"""
+""")
 
             # Analysis sections
-            for analysis_idx, analysis in enumerate(analyses):
-                analysis_type = analysis.get('analysis_type', 'LE')
-                speed = analysis.get('speed')
-                speed_str = f"{int(speed)} km/s" if speed else "Unknown"
-
-                model_runs = analysis.get('model_runs', [])
-
-                # Count Earth and spacecraft arrivals for this analysis
-                earth_runs = [mr for mr in model_runs if mr.get('earth_arrival_timestamp')]
-                spacecraft_runs = []
-                for mr in model_runs:
-                    for impact in mr.get('spacecraft_impacts', []):
-                        if impact.get('spacecraft_name', '').lower() != 'earth':
-                            spacecraft_runs.append((mr, impact))
-
+            for analysis_type, speed_str, earth_runs, spacecraft_runs in analysis_blocks:
+                total_earth_arrivals += len(earth_runs)
+                total_spacecraft_arrivals += len(spacecraft_runs)
                 total_predictions = len(earth_runs) + len(spacecraft_runs)
 
-                if total_predictions == 0:
-                    continue  # Skip analyses with no predictions
-
                 # Analysis header
                 bg_color = "#3498db" if analysis_type == "LE" else "#e67e22"
-                html += f"""
+                w(f"""
   <div style="background-color: {bg_color}; color: white; padding: 8px 12px; font-weight: bold;">
     {analysis_type} Analysis: {speed_str} | {total_predictions} arrival prediction(s)
   </div>
-  <table style="width: 100%; border-collapse: collapse;">
-    <thead>
-      <tr style="background-color: #ecf0f1;">
-        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Run #</th>
-        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Target</th>
-        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Predicted Arrival</th>
-        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Kp Est.</th>
-        <th style="padding: 8px; border: 1px solid #bdc3c7; text-align: left;">Details</th>
-      </tr>
-    </thead>
-    <tbody>
-"""
+""")
+                w(_ARRIVAL_TABLE_HEAD)
 
                 # Earth arrivals
                 for mr in earth_runs:
-                    run_num = mr.get('run_number', '—')
-                    arrival_time = mr.get('earth_arrival_time', '—')
+                    mr_get = mr.get
+                    run_num = mr_get('run_number', '—')
+                    arrival_time = _cell(mr_get('earth_arrival_time', '—'))
 
                     # Kp estimates
-                    kp_90 = mr.get('kp_90')
-                    kp_135 = mr.get('kp_135')
-                    kp_180 = mr.get('kp_180')
-
-                    if kp_90 and kp_180:
-                        kp_str = f"{kp_90}-{kp_180}"
-                    elif kp_90:
-                        kp_str = str(kp_90)
-                    else:
-                        kp_str = "—"
+                    kp_90 = mr_get('kp_90')
+                    kp_135 = mr_get('kp_135')
+                    kp_180 = mr_get('kp_180')
+
+                    kp_str = f"{kp_90}-{kp_180}" if kp_90 and kp_180 else (str(kp_90) if kp_90 else "—")
 
                     # Additional details
-                    details = []
+                    rmin = mr_get('rmin_earth_radii')
                     if kp_90 and kp_135 and kp_180:
-                        details.append(f"Kp 90°={kp_90}, 135°={kp_135}, 180°={kp_180}")
-                    rmin = mr.get('rmin_earth_radii')
-                    if rmin:
-                        details.append(f"Rmin={rmin} RE")
-                    details_str = " | ".join(details) if details else "—"
+                        details_str = f"Kp 90°={kp_90}, 135°={kp_135}, 180°={kp_180}"
+                        if rmin:
+                            details_str = f"{details_str} | Rmin={rmin} RE"
+                    elif rmin:
+                        details_str = f"Rmin={rmin} RE"
+                    else:
+                        details_str = "—"
 
-                    html += f"""      <tr style="background-color: #ffe6e6;">
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">{run_num}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">Earth</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">{arrival_time}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">{kp_str}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7; font-size: 0.85em;">{details_str}</td>
-      </tr>
-"""
+                    w(_earth_arrival_row(
+                        run_num=run_num, arrival_time=arrival_time, kp_str=kp_str, details_str=details_str
+                    ))
 
                 # Spacecraft arrivals
                 for mr, impact in spacecraft_runs:
                     run_num = mr.get('run_number', '—')
-                    spacecraft_name = impact.get('spacecraft_name', 'Unknown')
-                    arrival_time = impact.get('arrival_time', '—')
+                    spacecraft_name = _cell(impact.get('spacecraft_name', 'Unknown'))
+                    arrival_time = _cell(impact.get('arrival_time', '—'))
 
-                    html += f"""      <tr style="background-color: #fff9e6;">
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">{run_num}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7; font-weight: bold;">{spacecraft_name}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">{arrival_time}</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">—</td>
-        <td style="padding: 8px; border: 1px solid #bdc3c7;">—</td>
-      </tr>
-"""
+                    w(_spacecraft_arrival_row(
+                        run_num=run_num, spacecraft_name=spacecraft_name, arrival_time=arrival_time
+                    ))
 
-                html += """    </tbody>
-  </table>
-"""
+                w(_ARRIVAL_TABLE_CLOSE)
 
-            html += "</div>\n"  # Close CME container
+            w("</div>\n")  # Close CME container
+
+        if cme_num == 0:
+            return _NO_ARRIVALS_HTML
 
         # Overall summary
-        html += f"""
+        w(f"""
 <p style="margin-top: 15px; padding: 10px; background-color: #ecf0f1; border-radius: 5px; font-size: 0.9em;">
 <strong>Summary:</strong> {cme_num} CME event(s) with arrival predictions |
 Earth arrivals: {total_earth_arrivals} | Spacecraft arrivals: {total_spacecraft_arrivals}
 </p>
-<p style="font-size: 0.85em; color: #777; font-style: italic;">
-Note: LE (Leading Edge) = bulk CME material, SH (Shock) = shock wave ahead of CME. Shock arrives first.
-</p>
-"""
+""")
+        w(_ARRIVALS_NOTE_FOOTER)
 
-        return html
+        return buf.getvalue()
 
 
 
@@ -11,14 +11,58 @@ Data Source: https://kauai.ccmc.gsfc.nasa.gov/DONKI/
 """
 
 import sqlite3
+import hashlib
 import requests
 import logging
 import json
 import re
-from datetime import datetime, timedelta, timezone
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+
+# Optional: faster parsing of large DONKI responses (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Parameters per bulk IN (...) query (SQLite's historical default limit)
+SQLITE_MAX_PARAMS = 999
+
+# sync_cmes fetches long date ranges from DONKI in parallel windows of this size
+SYNC_WINDOW_DAYS = 7
+SYNC_MAX_WORKERS = 8
+
+# Columns returned by the get_* queries (everything except created_at/updated_at bookkeeping)
+CME_COLUMNS = (
+    'id', 'activity_id', 'catalog', 'start_time', 'start_timestamp', 'source_location',
+    'source_region', 'associated_flare', 'note', 'instruments', 'donki_url'
+)
+ANALYSIS_COLUMNS = (
+    'id', 'cme_id', 'activity_id', 'analysis_id', 'analysis_url', 'analysis_type',
+    'measurement_time', 'measurement_timestamp', 'technique', 'data_level', 'speed', 'type',
+    'direction_lon', 'direction_lat', 'half_angle', 'time_at_21_5_rs', 'instruments',
+    'image_type', 'submitted_by', 'submission_time'
+)
+MODEL_RUN_COLUMNS = (
+    'id', 'analysis_id', 'activity_id', 'run_number', 'model_completion_time',
+    'model_completion_timestamp', 'earth_arrival_time', 'earth_arrival_timestamp',
+    'impact_duration', 'rmin_earth_radii', 'kp_90', 'kp_135', 'kp_180'
+)
+SPACECRAFT_IMPACT_COLUMNS = (
+    'id', 'model_run_id', 'analysis_id', 'activity_id', 'spacecraft_name', 'arrival_time',
+    'arrival_timestamp'
+)
+
+
+def _iso_to_epoch(value: Optional[str]) -> Optional[int]:
+    """Convert a DONKI ISO-8601 time ('2025-11-05T10:00Z') to epoch seconds, or None if empty"""
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
 
 
 class EnhancedCMETracker:
@@ -42,11 +86,43 @@ class EnhancedCMETracker:
         """
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        self._conn: Optional[sqlite3.Connection] = None
         self._init_database()
 
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Shared database connection, opened on first use
+
+        Reusing one connection keeps the page cache warm across store/query
+        calls (a sync stores every CME in turn) instead of re-opening the
+        database, WAL and shared-memory files each time.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Close the shared database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        """Use the tracker as a context manager that closes its connection on exit"""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Close the shared database connection"""
+        self.close()
+
     def _init_database(self):
         """Initialize SQLite database with enhanced CME tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connection()
         cursor = conn.cursor()
 
         # Main CME table
@@ -188,11 +264,14 @@ class EnhancedCMETracker:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cme ON cme_analyses(cme_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_activity ON cme_analyses(activity_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_analysis ON cme_model_runs(analysis_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_arrival ON cme_model_runs(earth_arrival_timestamp)')
+        # Covers the arrival-window join (range on arrival time, join on analysis_id)
+        # without reading model run rows; supersedes the single-column index
+        cursor.execute('DROP INDEX IF EXISTS idx_model_arrival')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_model_arrival_cover '
+                       'ON cme_model_runs(earth_arrival_timestamp, analysis_id)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_spacecraft_model ON cme_spacecraft_impacts(model_run_id)')
 
         conn.commit()
-        conn.close()
 
         self.logger.info(f"Enhanced CME database initialized at {self.db_path}")
 
@@ -206,25 +285,10 @@ class EnhancedCMETracker:
             api_key: Deprecated - no longer needed (kept for compatibility)
 
         Returns:
-            List of CME dictionaries from DONKI API
+            List of CME dictionaries from DONKI API (empty if the request failed)
         """
         try:
-            # Use CCMC direct endpoint (no API key required, more current data)
-            url = "https://kauai.ccmc.gsfc.nasa.gov/DONKI/WS/get/CME"
-            params = {
-                'startDate': start_date,
-                'endDate': end_date
-            }
-
-            self.logger.info(f"Fetching CMEs from DONKI API: {start_date} to {end_date}")
-
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-
-            cmes = response.json()
-            self.logger.info(f"Fetched {len(cmes)} CMEs from DONKI API")
-
-            return cmes
+            return self._request_cmes(start_date, end_date)
 
         except requests.Timeout:
             self.logger.error("DONKI API timeout")
@@ -239,6 +303,32 @@ class EnhancedCMETracker:
             self.logger.error(f"Unexpected error fetching CMEs: {e}", exc_info=True)
             return []
 
+    def _request_cmes(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Request CMEs for a date range from DONKI, raising on any failure
+
+        Raises:
+            requests.RequestException: If the request fails or times out
+            json.JSONDecodeError: If the response is not valid JSON
+        """
+        # Use CCMC direct endpoint (no API key required, more current data)
+        url = "https://kauai.ccmc.gsfc.nasa.gov/DONKI/WS/get/CME"
+        params = {
+            'startDate': start_date,
+            'endDate': end_date
+        }
+
+        self.logger.info(f"Fetching CMEs from DONKI API: {start_date} to {end_date}")
+
+        response = requests.get(url, params=params, timeout=30)
+        response.raise_for_status()
+
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        cmes = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+        self.logger.info(f"Fetched {len(cmes)} CMEs from DONKI API")
+
+        return cmes
+
     def store_cme(self, cme_data: Dict) -> Optional[int]:
         """
         Store CME data from DONKI API into database
@@ -250,66 +340,77 @@ class EnhancedCMETracker:
             Database ID of stored CME, or None if storage failed
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            activity_id = cme_data['activityID']
-            start_time = cme_data['startTime']
-            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            start_timestamp = int(start_dt.timestamp())
+            conn = self._connection()
+            cme_id = self._insert_cme(conn.cursor(), cme_data, int(time.time()))
+            conn.commit()
 
-            # Extract basic CME info
-            source_location = cme_data.get('sourceLocation', '')
-            source_region = str(cme_data.get('activeRegionNum', '')) if cme_data.get('activeRegionNum') else None
-            instruments = ', '.join([inst['displayName'] for inst in cme_data.get('instruments', [])])
-            note = cme_data.get('note', '')
-            donki_url = cme_data.get('link', '')
+            self.logger.info(f"Stored CME {cme_data['activityID']} with ID {cme_id}")
+            return cme_id
 
-            # Extract associated flare
-            associated_flare = None
-            if 'linkedEvents' in cme_data and cme_data['linkedEvents']:
-                flare_events = [e['activityID'] for e in cme_data['linkedEvents'] if 'FLR' in e['activityID']]
-                if flare_events:
-                    associated_flare = flare_events[0]
+        except Exception as e:
+            if self._conn is not None:
+                self._conn.rollback()
+            self.logger.error(f"Failed to store CME {cme_data.get('activityID')}: {e}", exc_info=True)
+            return None
 
-            created_at = int(datetime.now(timezone.utc).timestamp())
+    def _insert_cme(self, cursor, cme_data: Dict, created_at: int) -> int:
+        """
+        Write a CME and its analyses without committing
 
-            # Insert or update CME
-            cursor.execute('''
-                INSERT OR REPLACE INTO cmes_enhanced
-                (activity_id, start_time, start_timestamp, source_location, source_region,
-                 associated_flare, note, instruments, donki_url, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (activity_id, start_time, start_timestamp, source_location, source_region,
-                  associated_flare, note, instruments, donki_url, created_at, created_at))
+        Args:
+            cursor: Cursor on the shared connection
+            cme_data: CME dictionary from DONKI API
+            created_at: Epoch seconds recorded on every row written
 
-            cme_id = cursor.lastrowid
+        Returns:
+            Database ID of the stored CME
 
-            # Store analyses
-            if 'cmeAnalyses' in cme_data:
-                for analysis in cme_data['cmeAnalyses']:
-                    self._store_analysis(cursor, cme_id, activity_id, analysis)
+        Raises:
+            Exception: If the CME cannot be parsed or written; the caller rolls back
+        """
+        activity_id = cme_data['activityID']
+        start_time = cme_data['startTime']
+        start_timestamp = _iso_to_epoch(start_time)
+
+        # Extract basic CME info
+        source_location = cme_data.get('sourceLocation', '')
+        source_region = str(cme_data.get('activeRegionNum', '')) if cme_data.get('activeRegionNum') else None
+        instruments = ', '.join([inst['displayName'] for inst in cme_data.get('instruments', [])])
+        note = cme_data.get('note', '')
+        donki_url = cme_data.get('link', '')
+
+        # Extract associated flare
+        associated_flare = None
+        if 'linkedEvents' in cme_data and cme_data['linkedEvents']:
+            flare_events = [e['activityID'] for e in cme_data['linkedEvents'] if 'FLR' in e['activityID']]
+            if flare_events:
+                associated_flare = flare_events[0]
+
+        # Insert or update CME
+        cursor.execute('''
+            INSERT OR REPLACE INTO cmes_enhanced
+            (activity_id, start_time, start_timestamp, source_location, source_region,
+             associated_flare, note, instruments, donki_url, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (activity_id, start_time, start_timestamp, source_location, source_region,
+              associated_flare, note, instruments, donki_url, created_at, created_at))
 
-            conn.commit()
-            conn.close()
+        cme_id = cursor.lastrowid
 
-            self.logger.info(f"Stored CME {activity_id} with ID {cme_id}")
-            return cme_id
+        # Store analyses
+        if 'cmeAnalyses' in cme_data:
+            for analysis in cme_data['cmeAnalyses']:
+                self._store_analysis(cursor, cme_id, activity_id, analysis, created_at)
 
-        except Exception as e:
-            self.logger.error(f"Failed to store CME {activity_id}: {e}", exc_info=True)
-            return None
+        return cme_id
 
-    def _store_analysis(self, cursor, cme_id: int, activity_id: str, analysis: Dict):
+    def _store_analysis(self, cursor, cme_id: int, activity_id: str, analysis: Dict, created_at: int):
         """Store CME analysis (LE or SH) from API data"""
         try:
             # Extract analysis details
             analysis_type = analysis.get('featureCode', 'LE')  # 'LE' or 'SH'
             measurement_time = analysis.get('time21_5', '')
-            measurement_timestamp = None
-            if measurement_time:
-                measurement_dt = datetime.fromisoformat(measurement_time.replace('Z', '+00:00'))
-                measurement_timestamp = int(measurement_dt.timestamp())
+            measurement_timestamp = _iso_to_epoch(measurement_time)
 
             technique = analysis.get('measurementTechnique', '')
             data_level = analysis.get('levelOfData', 0)
@@ -322,10 +423,10 @@ class EnhancedCMETracker:
             image_type = analysis.get('imageType', '')
             note = analysis.get('note', '')
 
-            created_at = int(datetime.now(timezone.utc).timestamp())
-
-            # Generate a unique analysis ID (use hash of key parameters)
-            analysis_id = abs(hash(f"{activity_id}_{analysis_type}_{measurement_time}")) % 1000000
+            # Stable analysis ID from the key parameters. hash() is salted per process,
+            # so re-syncs never matched the stored row and duplicated every analysis
+            analysis_key = f"{activity_id}_{analysis_type}_{measurement_time}".encode('utf-8')
+            analysis_id = int.from_bytes(hashlib.blake2b(analysis_key, digest_size=7).digest(), 'big')
 
             # Insert or update analysis
             cursor.execute('''
@@ -343,25 +444,20 @@ class EnhancedCMETracker:
             # Store ENLIL model runs
             if 'enlilList' in analysis and analysis['enlilList']:
                 for run_num, enlil in enumerate(analysis['enlilList'], 1):
-                    self._store_model_run(cursor, analysis_db_id, activity_id, run_num, enlil)
+                    self._store_model_run(cursor, analysis_db_id, activity_id, run_num, enlil, created_at)
 
         except Exception as e:
             self.logger.error(f"Failed to store analysis: {e}", exc_info=True)
 
-    def _store_model_run(self, cursor, analysis_id: int, activity_id: str, run_number: int, enlil: Dict):
+    def _store_model_run(self, cursor, analysis_id: int, activity_id: str, run_number: int, enlil: Dict,
+                         created_at: int):
         """Store WSA-ENLIL+Cone model run from API data"""
         try:
             model_completion_time = enlil.get('modelCompletionTime', '')
-            model_completion_timestamp = None
-            if model_completion_time:
-                completion_dt = datetime.fromisoformat(model_completion_time.replace('Z', '+00:00'))
-                model_completion_timestamp = int(completion_dt.timestamp())
+            model_completion_timestamp = _iso_to_epoch(model_completion_time)
 
             earth_arrival_time = enlil.get('estimatedShockArrivalTime')
-            earth_arrival_timestamp = None
-            if earth_arrival_time:
-                arrival_dt = datetime.fromisoformat(earth_arrival_time.replace('Z', '+00:00'))
-                earth_arrival_timestamp = int(arrival_dt.timestamp())
+            earth_arrival_timestamp = _iso_to_epoch(earth_arrival_time)
 
             impact_duration = enlil.get('estimatedDuration')
             rmin_earth_radii = enlil.get('rmin_re')
@@ -369,8 +465,6 @@ class EnhancedCMETracker:
             kp_135 = enlil.get('kp_135')
             kp_180 = enlil.get('kp_180')
 
-            created_at = int(datetime.now(timezone.utc).timestamp())
-
             # Insert model run
             cursor.execute('''
                 INSERT OR REPLACE INTO cme_model_runs
@@ -384,40 +478,55 @@ class EnhancedCMETracker:
 
             model_run_id = cursor.lastrowid
 
-            # Store spacecraft impacts
+            # Store spacecraft impacts in one batch
             if 'impactList' in enlil and enlil['impactList']:
-                for impact in enlil['impactList']:
-                    self._store_spacecraft_impact(cursor, model_run_id, analysis_id, activity_id, impact)
+                impact_rows = [
+                    row for row in (
+                        self._spacecraft_impact_row(model_run_id, analysis_id, activity_id, impact, created_at)
+                        for impact in enlil['impactList']
+                    )
+                    if row is not None
+                ]
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO cme_spacecraft_impacts
+                    (model_run_id, analysis_id, activity_id, spacecraft_name, arrival_time, arrival_timestamp, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', impact_rows)
 
         except Exception as e:
             self.logger.error(f"Failed to store model run: {e}", exc_info=True)
 
-    def _store_spacecraft_impact(self, cursor, model_run_id: int, analysis_id: int,
-                                 activity_id: str, impact: Dict):
-        """Store spacecraft impact prediction from API data"""
+    def _spacecraft_impact_row(self, model_run_id: int, analysis_id: int,
+                               activity_id: str, impact: Dict, created_at: int) -> Optional[tuple]:
+        """Build the cme_spacecraft_impacts row for an impact prediction from API data"""
+        spacecraft_name = impact.get('location', '')
+        if spacecraft_name is None:
+            # spacecraft_name is NOT NULL; drop the row here so it cannot fail the whole batch
+            self.logger.warning(f"Skipping spacecraft impact without a location for {activity_id}")
+            return None
+
         try:
-            spacecraft_name = impact.get('location', '')
             arrival_time = impact.get('arrivalTime')
-            arrival_timestamp = None
-            if arrival_time:
-                arrival_dt = datetime.fromisoformat(arrival_time.replace('Z', '+00:00'))
-                arrival_timestamp = int(arrival_dt.timestamp())
+            arrival_timestamp = _iso_to_epoch(arrival_time)
 
-            created_at = int(datetime.now(timezone.utc).timestamp())
-
-            cursor.execute('''
-                INSERT OR REPLACE INTO cme_spacecraft_impacts
-                (model_run_id, analysis_id, activity_id, spacecraft_name, arrival_time, arrival_timestamp, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (model_run_id, analysis_id, activity_id, spacecraft_name, arrival_time, arrival_timestamp, created_at))
+            return (model_run_id, analysis_id, activity_id, spacecraft_name,
+                    arrival_time, arrival_timestamp, created_at)
 
         except Exception as e:
-            self.logger.error(f"Failed to store spacecraft impact: {e}", exc_info=True)
+            self.logger.error(f"Failed to parse spacecraft impact: {e}", exc_info=True)
+            return None
 
     def sync_cmes(self, start_date: str, end_date: str, api_key: str = None) -> int:
         """
         Fetch and store all CMEs for the specified date range
 
+        Long ranges are split into SYNC_WINDOW_DAYS windows fetched
+        concurrently. Once every window has arrived, all CMEs are stored in a
+        single transaction, so the WAL is synced once per sync rather than once
+        per CME; a CME that fails to store is rolled back on its own. Windows
+        that fail to fetch are logged as an incomplete sync; the CMEs from the
+        other windows are still stored.
+
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
@@ -427,52 +536,108 @@ class EnhancedCMETracker:
             Number of CMEs stored
         """
         try:
-            cmes = self.fetch_cmes_from_api(start_date, end_date, api_key)
-
+            windows = self._sync_windows(start_date, end_date)
+
+            cmes = []
+            failed_windows = []
+            with ThreadPoolExecutor(max_workers=min(SYNC_MAX_WORKERS, len(windows))) as executor:
+                futures = {
+                    executor.submit(self._request_cmes, window_start, window_end): (window_start, window_end)
+                    for window_start, window_end in windows
+                }
+                for future in as_completed(futures):
+                    window_start, window_end = futures[future]
+                    try:
+                        cmes.extend(future.result())
+                    except Exception as e:
+                        self.logger.error(f"Failed to fetch CMEs for {window_start} to {window_end}: {e}")
+                        failed_windows.append((window_start, window_end))
+
+            # Write lock is only taken once the network fetches are done
+            conn = self._connection()
+            cursor = conn.cursor()
+            created_at = int(time.time())
             stored_count = 0
+
+            cursor.execute('BEGIN IMMEDIATE')
             for cme in cmes:
-                if self.store_cme(cme):
+                cursor.execute('SAVEPOINT store_cme')
+                try:
+                    cme_id = self._insert_cme(cursor, cme, created_at)
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO store_cme')
+                    self.logger.error(f"Failed to store CME {cme.get('activityID')}: {e}", exc_info=True)
+                else:
                     stored_count += 1
+                    self.logger.info(f"Stored CME {cme['activityID']} with ID {cme_id}")
+                cursor.execute('RELEASE store_cme')
+            conn.commit()
+
+            # Refresh planner statistics for tables that changed significantly
+            if stored_count:
+                conn.execute('PRAGMA optimize')
 
             self.logger.info(f"Synced {stored_count}/{len(cmes)} CMEs to database")
+            if failed_windows:
+                missing = ', '.join(f"{start} to {end}" for start, end in sorted(failed_windows))
+                self.logger.warning(
+                    f"CME sync incomplete: {len(failed_windows)}/{len(windows)} date windows "
+                    f"could not be fetched ({missing})"
+                )
             return stored_count
 
         except Exception as e:
+            if self._conn is not None and self._conn.in_transaction:
+                self._conn.rollback()
             self.logger.error(f"Failed to sync CMEs: {e}", exc_info=True)
             return 0
 
-    def get_cmes_for_period(self, start_time: datetime, end_time: datetime) -> List[Dict]:
+    @staticmethod
+    def _sync_windows(start_date: str, end_date: str) -> List[tuple]:
+        """Split an inclusive YYYY-MM-DD range into consecutive SYNC_WINDOW_DAYS windows"""
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        windows = []
+        while True:
+            window_end = min(start + timedelta(days=SYNC_WINDOW_DAYS - 1), end)
+            windows.append((start.isoformat(), window_end.isoformat()))
+            start = window_end + timedelta(days=1)
+            if start > end:
+                return windows
+
+    def get_cmes_for_period(self, start_time: datetime, end_time: datetime,
+                            limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """
         Get CMEs that occurred during the specified period
 
         Args:
-            start_time: Start of period (UTC datetime)
-            end_time: End of period (UTC datetime)
+            start_time: Start of period (UTC datetime, inclusive)
+            end_time: End of period (UTC datetime, exclusive)
+            limit: Maximum number of CMEs to return (default: all)
+            offset: Number of CMEs to skip, for paging with limit
 
         Returns:
-            List of CME dictionaries with all analyses
+            List of CME dictionaries with all analyses, newest first (sorted in SQL)
         """
         try:
             start_ts = int(start_time.timestamp())
             end_ts = int(end_time.timestamp())
 
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            cursor = self._connection().cursor()
+            cursor.row_factory = None  # Plain tuples; zipped with the column list below
 
-            cursor.execute('''
-                SELECT * FROM cmes_enhanced
-                WHERE start_timestamp >= ? AND start_timestamp <= ?
-                ORDER BY start_timestamp DESC
-            ''', (start_ts, end_ts))
+            cursor.execute(f'''
+                SELECT {', '.join(CME_COLUMNS)} FROM cmes_enhanced
+                WHERE start_timestamp >= ? AND start_timestamp < ?
+                ORDER BY start_timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (start_ts, end_ts, -1 if limit is None else limit, offset))
 
-            cmes = [dict(row) for row in cursor.fetchall()]
+            cmes = [dict(zip(CME_COLUMNS, row)) for row in cursor.fetchall()]
 
-            # Fetch analyses for each CME
-            for cme in cmes:
-                cme['analyses'] = self._get_analyses_for_cme(cursor, cme['id'])
-
-            conn.close()
+            # Fetch analyses, model runs and impacts for all CMEs at once
+            self._attach_analyses(cursor, cmes)
 
             self.logger.info(f"Retrieved {len(cmes)} CMEs for period")
             return cmes
@@ -482,7 +647,8 @@ class EnhancedCMETracker:
             return []
 
     def get_cmes_with_arrivals_in_window(self, window_start: datetime, window_end: datetime,
-                                         uncertainty_hours: int = 7) -> List[Dict]:
+                                         uncertainty_hours: int = 7, limit: Optional[int] = None,
+                                         offset: int = 0) -> List[Dict]:
         """
         Get CMEs with predicted Earth arrivals within the specified time window
         Includes ±uncertainty_hours around predicted arrival times
@@ -491,9 +657,11 @@ class EnhancedCMETracker:
             window_start: Start of forecast window (UTC datetime)
             window_end: End of forecast window (UTC datetime)
             uncertainty_hours: Hours of uncertainty to add around predictions (default: ±7)
+            limit: Maximum number of CMEs to return (default: all)
+            offset: Number of CMEs to skip, for paging with limit
 
         Returns:
-            List of CME dictionaries with arrival predictions in window
+            List of CME dictionaries with arrival predictions in window, newest first (sorted in SQL)
         """
         try:
             # Expand window by uncertainty
@@ -503,27 +671,24 @@ class EnhancedCMETracker:
             start_ts = int(expanded_start.timestamp())
             end_ts = int(expanded_end.timestamp())
 
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            cursor = self._connection().cursor()
+            cursor.row_factory = None  # Plain tuples; zipped with the column list below
 
             # Find CMEs with model runs that have Earth arrivals in the window
-            cursor.execute('''
-                SELECT DISTINCT c.*
+            cursor.execute(f'''
+                SELECT DISTINCT {', '.join('c.' + column for column in CME_COLUMNS)}
                 FROM cmes_enhanced c
                 JOIN cme_analyses a ON c.id = a.cme_id
                 JOIN cme_model_runs m ON a.id = m.analysis_id
-                WHERE m.earth_arrival_timestamp >= ? AND m.earth_arrival_timestamp <= ?
-                ORDER BY c.start_timestamp DESC
-            ''', (start_ts, end_ts))
+                WHERE m.earth_arrival_timestamp >= ? AND m.earth_arrival_timestamp < ?
+                ORDER BY c.start_timestamp DESC, c.id DESC
+                LIMIT ? OFFSET ?
+            ''', (start_ts, end_ts, -1 if limit is None else limit, offset))
 
-            cmes = [dict(row) for row in cursor.fetchall()]
+            cmes = [dict(zip(CME_COLUMNS, row)) for row in cursor.fetchall()]
 
-            # Fetch analyses for each CME
-            for cme in cmes:
-                cme['analyses'] = self._get_analyses_for_cme(cursor, cme['id'])
-
-            conn.close()
+            # Fetch analyses, model runs and impacts for all CMEs at once
+            self._attach_analyses(cursor, cmes)
 
             self.logger.info(f"Retrieved {len(cmes)} CMEs with arrivals in window")
             return cmes
@@ -532,43 +697,77 @@ class EnhancedCMETracker:
             self.logger.error(f"Failed to get CMEs with arrivals: {e}", exc_info=True)
             return []
 
-    def _get_analyses_for_cme(self, cursor, cme_id: int) -> List[Dict]:
-        """Helper method to get all analyses for a CME"""
-        cursor.execute('''
-            SELECT * FROM cme_analyses
-            WHERE cme_id = ?
-            ORDER BY analysis_type, analysis_id
-        ''', (cme_id,))
+    @staticmethod
+    def _select_by_parent(cursor, table: str, columns: tuple, parent_column: str, parent_ids: List[int],
+                          order_by: str) -> Dict[int, List[Dict]]:
+        """
+        Fetch the child rows of many parents with bulk IN queries
 
-        analyses = [dict(row) for row in cursor.fetchall()]
+        Args:
+            cursor: Cursor returning plain tuple rows
+            table: Child table name
+            columns: Columns to select (must include parent_column)
+            parent_column: Column holding the parent's id
+            parent_ids: Ids of the parent rows
+            order_by: ORDER BY clause applied within each parent
 
-        # Get model runs for each analysis
-        for analysis in analyses:
-            cursor.execute('''
-                SELECT * FROM cme_model_runs
-                WHERE analysis_id = ?
-                ORDER BY run_number
-            ''', (analysis['id'],))
+        Returns:
+            Dictionary of parent id -> list of child row dicts (empty if none)
+        """
+        children = {parent_id: [] for parent_id in parent_ids}
+        select = ', '.join(columns)
+        parent_index = columns.index(parent_column)
+
+        for i in range(0, len(parent_ids), SQLITE_MAX_PARAMS):
+            chunk = parent_ids[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f'SELECT {select} FROM {table} WHERE {parent_column} IN ({placeholders}) ORDER BY {order_by}',
+                chunk
+            )
+            for row in cursor.fetchall():
+                children[row[parent_index]].append(dict(zip(columns, row)))
 
-            analysis['model_runs'] = [dict(row) for row in cursor.fetchall()]
+        return children
 
-            # Get spacecraft impacts for each model run
-            for model_run in analysis['model_runs']:
-                cursor.execute('''
-                    SELECT * FROM cme_spacecraft_impacts
-                    WHERE model_run_id = ?
-                    ORDER BY spacecraft_name
-                ''', (model_run['id'],))
+    def _attach_analyses(self, cursor, cmes: List[Dict]):
+        """
+        Attach analyses, model runs and spacecraft impacts to CME dictionaries
 
-                model_run['spacecraft_impacts'] = [dict(row) for row in cursor.fetchall()]
+        Issues one query per table for the whole result set rather than one
+        per CME, analysis and model run.
+        """
+        analyses_by_cme = self._select_by_parent(
+            cursor, 'cme_analyses', ANALYSIS_COLUMNS, 'cme_id',
+            [cme['id'] for cme in cmes], 'analysis_type, analysis_id'
+        )
+        analyses = []
+        for cme in cmes:
+            cme['analyses'] = analyses_by_cme[cme['id']]
+            analyses.extend(cme['analyses'])
+
+        runs_by_analysis = self._select_by_parent(
+            cursor, 'cme_model_runs', MODEL_RUN_COLUMNS, 'analysis_id',
+            [analysis['id'] for analysis in analyses], 'run_number'
+        )
+        model_runs = []
+        for analysis in analyses:
+            analysis['model_runs'] = runs_by_analysis[analysis['id']]
+            model_runs.extend(analysis['model_runs'])
 
-        return analyses
+        impacts_by_run = self._select_by_parent(
+            cursor, 'cme_spacecraft_impacts', SPACECRAFT_IMPACT_COLUMNS, 'model_run_id',
+            [run['id'] for run in model_runs], 'spacecraft_name'
+        )
+        for model_run in model_runs:
+            model_run['spacecraft_impacts'] = impacts_by_run[model_run['id']]
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
 
     tracker = EnhancedCMETracker()
+    tracker.close()
     print("Enhanced CME Tracker initialized")
     print("Database schema created with tables:")
     print("  - cmes_enhanced (main CME data)")
@@ -12,6 +12,9 @@ import sys
 from datetime import datetime, timezone
 from flare_tracker_simple import SimpleFlareTracker
 
+# Longest single sleep between scheduler checks (seconds)
+MAX_IDLE_SLEEP = 900
+
 
 def collect_flares():
     """Run flare collection cycle"""
@@ -77,7 +80,10 @@ def main():
     try:
         while True:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            # Sleep until the next job is due instead of polling every minute;
+            # capped so suspend/resume or clock changes delay a run by at most MAX_IDLE_SLEEP
+            idle = schedule.idle_seconds()
+            time.sleep(min(MAX_IDLE_SLEEP, max(1, idle if idle is not None else MAX_IDLE_SLEEP)))
     except KeyboardInterrupt:
         logger.info("\nFlare collection scheduler stopped by user")
         sys.exit(0)
@@ -1,13 +1,23 @@
 # Model Providers Package
 # Provides a unified interface for multiple AI model providers
 
-from .base import ModelProvider, ModelResponse
-from .factory import get_provider, list_available_models, get_model_info
+from .base import ModelProvider, ModelResponse, ModelStream, ProviderError
+from .factory import (
+    get_provider,
+    list_available_models,
+    list_available_models_serialized,
+    register_model,
+    get_model_info
+)
 
 __all__ = [
     'ModelProvider',
     'ModelResponse',
+    'ModelStream',
+    'ProviderError',
     'get_provider',
     'list_available_models',
+    'list_available_models_serialized',
+    'register_model',
     'get_model_info'
 ]
@@ -5,13 +5,15 @@ Implements the ModelProvider interface for Anthropic's Claude models.
 """
 
 import os
+import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterator
 
 from .base import (
     ModelProvider,
     ModelConfig,
     ModelResponse,
+    ModelStream,
     ProviderType,
     ProviderError
 )
@@ -42,6 +44,9 @@ class AnthropicProvider(ModelProvider):
     # Environment variable for API key
     API_KEY_ENV = "ANTHROPIC_API_KEY"
 
+    # Message Batches API is available for all Claude models
+    SUPPORTS_BATCH = True
+
     def __init__(self, model_config: ModelConfig, api_key: Optional[str] = None):
         """
         Initialize Anthropic provider
@@ -67,7 +72,10 @@ class AnthropicProvider(ModelProvider):
 
         try:
             import anthropic
-            self._client = anthropic.Anthropic(api_key=self.api_key)
+            client_kwargs = {"api_key": self.api_key}
+            if self.http_client is not None:
+                client_kwargs["http_client"] = self.http_client
+            self._client = anthropic.Anthropic(**client_kwargs)
             logger.debug(f"Initialized Anthropic client for model {self.model_id}")
         except ImportError:
             raise ProviderError(
@@ -114,63 +122,212 @@ class AnthropicProvider(ModelProvider):
                 provider="anthropic"
             )
 
+        api_kwargs = self._build_api_kwargs(prompt, system_prompt, max_tokens, temperature, **kwargs)
+
+        try:
+            logger.debug(f"Calling Anthropic API with model {self.model_id}")
+            response = self._client.messages.create(**api_kwargs)
+            return self._to_model_response(response)
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Anthropic API error: {error_msg}")
+            raise ProviderError(
+                f"API call failed: {error_msg}",
+                provider="anthropic",
+                original_error=e
+            )
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> ModelStream:
+        """
+        Generate a response using Claude, yielding text as it is streamed
+
+        Args:
+            prompt: The user message to send
+            system_prompt: Optional system instructions
+            max_tokens: Maximum tokens to generate (default: model's max_tokens)
+            temperature: Sampling temperature (default: model's default_temperature)
+            **kwargs: Additional parameters passed to the API
+
+        Returns:
+            ModelStream over the generated text chunks
+
+        Raises:
+            ProviderError: If API call fails (raised while iterating)
+        """
+        # Initialize client if needed
+        self._initialize_client()
+
+        if not self.api_key:
+            raise ProviderError(
+                f"No API key configured. Set {self.API_KEY_ENV} environment variable.",
+                provider="anthropic"
+            )
+
+        api_kwargs = self._build_api_kwargs(prompt, system_prompt, max_tokens, temperature, **kwargs)
+        stream = ModelStream(model=self.model_id, provider="anthropic")
+
+        def chunks() -> Iterator[str]:
+            try:
+                logger.debug(f"Streaming from Anthropic API with model {self.model_id}")
+                with self._client.messages.stream(**api_kwargs) as message_stream:
+                    for text in message_stream.text_stream:
+                        yield text
+                    final = message_stream.get_final_message()
+
+                stream.model = final.model
+                stream.finish_reason = final.stop_reason
+                stream.usage = {
+                    'input_tokens': final.usage.input_tokens,
+                    'output_tokens': final.usage.output_tokens,
+                    'total_tokens': final.usage.input_tokens + final.usage.output_tokens
+                }
+
+            except Exception as e:
+                error_msg = str(e)
+                logger.error(f"Anthropic API error: {error_msg}")
+                raise ProviderError(
+                    f"API call failed: {error_msg}",
+                    provider="anthropic",
+                    original_error=e
+                )
+
+        stream.chunks = chunks()
+        return stream
+
+    def _build_api_kwargs(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build Messages API parameters for a single prompt"""
         # Set defaults
         max_tokens = max_tokens or self.model_config.max_tokens
         temperature = temperature if temperature is not None else self.model_config.default_temperature
 
-        # Build messages
-        messages = [{"role": "user", "content": prompt}]
+        api_kwargs = {
+            "model": self.model_id,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
 
-        try:
-            # Make API call
-            api_kwargs = {
-                "model": self.model_id,
-                "max_tokens": max_tokens,
-                "messages": messages,
-            }
+        # Add system prompt if provided
+        if system_prompt:
+            api_kwargs["system"] = system_prompt
 
-            # Add system prompt if provided
-            if system_prompt:
-                api_kwargs["system"] = system_prompt
+        # Add temperature if not default
+        if temperature != 1.0:
+            api_kwargs["temperature"] = temperature
 
-            # Add temperature if not default
-            if temperature != 1.0:
-                api_kwargs["temperature"] = temperature
+        # Add any additional kwargs
+        api_kwargs.update(kwargs)
+        return api_kwargs
 
-            # Add any additional kwargs
-            api_kwargs.update(kwargs)
+    @staticmethod
+    def _to_model_response(response) -> ModelResponse:
+        """Convert an Anthropic Message into a standardized ModelResponse"""
+        # Extract content
+        content = ""
+        if response.content:
+            content = response.content[0].text
+
+        return ModelResponse(
+            content=content,
+            model=response.model,
+            provider="anthropic",
+            usage={
+                'input_tokens': response.usage.input_tokens,
+                'output_tokens': response.usage.output_tokens,
+                'total_tokens': response.usage.input_tokens + response.usage.output_tokens
+            },
+            finish_reason=response.stop_reason,
+            raw_response=response
+        )
 
-            logger.debug(f"Calling Anthropic API with model {self.model_id}")
-            response = self._client.messages.create(**api_kwargs)
+    def batch_generate(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        poll_interval: float = 30.0,
+        **kwargs
+    ) -> List[ModelResponse]:
+        """
+        Generate responses for many prompts via the Message Batches API
 
-            # Extract content
-            content = ""
-            if response.content:
-                content = response.content[0].text
+        Batches are billed at a discount but may take minutes to hours to
+        complete; this call blocks, polling until the batch has ended.
 
-            # Build standardized response
-            return ModelResponse(
-                content=content,
-                model=response.model,
-                provider="anthropic",
-                usage={
-                    'input_tokens': response.usage.input_tokens,
-                    'output_tokens': response.usage.output_tokens,
-                    'total_tokens': response.usage.input_tokens + response.usage.output_tokens
-                },
-                finish_reason=response.stop_reason,
-                raw_response=response
+        Args:
+            prompts: User prompts to send
+            system_prompt: Optional system instructions applied to every prompt
+            max_tokens: Maximum tokens to generate per prompt
+            temperature: Sampling temperature
+            poll_interval: Seconds between batch status checks
+            **kwargs: Additional parameters passed to each request
+
+        Returns:
+            List of ModelResponse in prompt order (failed items have finish_reason='error')
+
+        Raises:
+            ProviderError: If the batch cannot be submitted or retrieved
+        """
+        self._initialize_client()
+
+        if not self.api_key:
+            raise ProviderError(
+                f"No API key configured. Set {self.API_KEY_ENV} environment variable.",
+                provider="anthropic"
             )
 
+        requests = [
+            {
+                "custom_id": f"request-{idx}",
+                "params": self._build_api_kwargs(prompt, system_prompt, max_tokens, temperature, **kwargs)
+            }
+            for idx, prompt in enumerate(prompts)
+        ]
+
+        try:
+            batch = self._client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted Anthropic message batch {batch.id} ({len(prompts)} requests)")
+
+            while batch.processing_status != "ended":
+                time.sleep(poll_interval)
+                batch = self._client.messages.batches.retrieve(batch.id)
+
+            results = {}
+            for entry in self._client.messages.batches.results(batch.id):
+                if entry.result.type == "succeeded":
+                    results[entry.custom_id] = self._to_model_response(entry.result.message)
+                else:
+                    results[entry.custom_id] = self._error_response(f"Batch request {entry.result.type}")
+
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"Anthropic API error: {error_msg}")
+            logger.error(f"Anthropic batch API error: {error_msg}")
             raise ProviderError(
-                f"API call failed: {error_msg}",
+                f"Batch API call failed: {error_msg}",
                 provider="anthropic",
                 original_error=e
             )
 
+        return [
+            results.get(req["custom_id"]) or self._error_response("Missing batch result")
+            for req in requests
+        ]
+
     def validate_api_key(self) -> bool:
         """
         Validate the Anthropic API key
@@ -5,9 +5,10 @@ This module defines the abstract interface that all model providers must impleme
 This allows for a unified API across different AI providers (Anthropic, OpenAI, etc.)
 """
 
+import io
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 from enum import Enum
 
 
@@ -54,6 +55,50 @@ class ModelResponse:
         return self.usage.get('total_tokens', self.input_tokens + self.output_tokens)
 
 
+class ModelStream:
+    """
+    Iterator over the text chunks of a streamed model response
+
+    Iterate to receive content as it is generated. Once the stream is
+    exhausted, `response` holds the complete ModelResponse. Providers fill in
+    `usage`, `finish_reason` and `model` while producing chunks.
+
+    Usage:
+        stream = provider.generate_stream("Your prompt here")
+        for chunk in stream:
+            print(chunk, end="")
+        print(stream.response.finish_reason)
+    """
+
+    def __init__(self, model: str, provider: str, chunks: Optional[Iterator[str]] = None):
+        self.model = model
+        self.provider = provider
+        self.usage: Dict[str, int] = {}
+        self.finish_reason: Optional[str] = None
+        self.response: Optional[ModelResponse] = None
+        self.chunks = chunks
+        self._buffer = io.StringIO()
+
+    def __iter__(self) -> "ModelStream":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            if self.response is None:
+                self.response = ModelResponse(
+                    content=self._buffer.getvalue(),
+                    model=self.model,
+                    provider=self.provider,
+                    usage=self.usage,
+                    finish_reason=self.finish_reason
+                )
+            raise
+        self._buffer.write(chunk)
+        return chunk
+
+
 @dataclass
 class ModelConfig:
     """
@@ -106,6 +151,9 @@ class ModelProvider(ABC):
         print(response.content)
     """
 
+    # Whether batch_generate uses a native (discounted, asynchronous) batch endpoint
+    SUPPORTS_BATCH = False
+
     def __init__(self, model_config: ModelConfig, api_key: Optional[str] = None):
         """
         Initialize the provider
@@ -118,6 +166,11 @@ class ModelProvider(ABC):
         self.api_key = api_key
         self._client = None
 
+        # Optional shared httpx.Client handed to SDKs that accept one, so
+        # providers can reuse a single connection pool; must be set before
+        # the first API call
+        self.http_client = None
+
     @property
     def model_name(self) -> str:
         """Get the user-friendly model name"""
@@ -170,6 +223,100 @@ class ModelProvider(ABC):
         """
         pass
 
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> ModelStream:
+        """
+        Generate a response from the model, yielding text as it arrives
+
+        The default implementation makes a blocking generate() call and yields
+        the whole content as a single chunk. Providers with streaming APIs
+        override this.
+
+        Args:
+            prompt: The user prompt to send to the model
+            system_prompt: Optional system prompt for context/instructions
+            max_tokens: Maximum tokens to generate (uses model default if not specified)
+            temperature: Sampling temperature (uses model default if not specified)
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            ModelStream over the generated text chunks
+
+        Raises:
+            ProviderError: If the API call fails (raised while iterating)
+        """
+        stream = ModelStream(model=self.model_id, provider=self.provider_type.value)
+
+        def chunks() -> Iterator[str]:
+            response = self.generate(
+                prompt,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs
+            )
+            stream.model = response.model
+            stream.usage = response.usage
+            stream.finish_reason = response.finish_reason
+            yield response.content
+
+        stream.chunks = chunks()
+        return stream
+
+    def batch_generate(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> List[ModelResponse]:
+        """
+        Generate responses for many prompts
+
+        The default implementation calls generate() once per prompt. Providers
+        with a native batch endpoint override this and set SUPPORTS_BATCH.
+
+        Args:
+            prompts: User prompts to send
+            system_prompt: Optional system instructions applied to every prompt
+            max_tokens: Maximum tokens to generate per prompt
+            temperature: Sampling temperature
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            List of ModelResponse in prompt order (failed items have finish_reason='error')
+        """
+        responses = []
+        for prompt in prompts:
+            try:
+                responses.append(self.generate(
+                    prompt,
+                    system_prompt=system_prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **kwargs
+                ))
+            except ProviderError as e:
+                responses.append(self._error_response(str(e)))
+        return responses
+
+    def _error_response(self, message: str) -> ModelResponse:
+        """Build a placeholder response for a failed batch item"""
+        return ModelResponse(
+            content="",
+            model=self.model_id,
+            provider=self.provider_type.value,
+            finish_reason="error",
+            raw_response=message
+        )
+
     @abstractmethod
     def validate_api_key(self) -> bool:
         """
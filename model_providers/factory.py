@@ -7,7 +7,9 @@ Supports loading configuration from YAML files.
 
 import os
 import logging
-from typing import Optional, Dict, Any, List
+import functools
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping
 
 import yaml
 
@@ -25,6 +27,11 @@ PROVIDER_CLASSES = {
     ProviderType.GOOGLE: GoogleProvider,
 }
 
+# Models registered at runtime with register_model(); the version is bumped on
+# every registration so cached model listings are rebuilt
+_REGISTERED_MODELS: Dict[str, ModelConfig] = {}
+_MODELS_CACHE_VERSION = 0
+
 
 def _get_all_builtin_models() -> Dict[str, ModelConfig]:
     """
@@ -145,9 +152,47 @@ def list_available_models(
     config_models = _load_models_from_config(config_path)
     models.update(config_models)
 
+    # Runtime registrations take precedence
+    models.update(_REGISTERED_MODELS)
+
     return models
 
 
+def register_model(model_config: ModelConfig) -> None:
+    """
+    Register an additional model at runtime
+
+    Args:
+        model_config: Configuration for the model (replaces any model with the same name)
+    """
+    global _MODELS_CACHE_VERSION
+    _REGISTERED_MODELS[model_config.name] = model_config
+    _MODELS_CACHE_VERSION += 1
+    logger.debug(f"Registered model: {model_config.name}")
+
+
+@functools.lru_cache(maxsize=1)
+def _serialized_models(version: int) -> Mapping[str, Mapping[str, Any]]:
+    """Serialize the default model listing (cached per registry version)"""
+    return MappingProxyType({
+        name: MappingProxyType(config.to_dict())
+        for name, config in list_available_models().items()
+    })
+
+
+def list_available_models_serialized() -> Mapping[str, Mapping[str, Any]]:
+    """
+    List all available models as dictionaries
+
+    The result is built once per registry version and returned as read-only
+    views, so repeated calls do not re-read the config or re-serialize models.
+
+    Returns:
+        Read-only mapping of model name -> model info
+    """
+    return _serialized_models(_MODELS_CACHE_VERSION)
+
+
 def get_model_info(
     model_name: str,
     config_path: Optional[str] = None
@@ -6,12 +6,13 @@ Implements the ModelProvider interface for Google's Gemini models.
 
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 
 from .base import (
     ModelProvider,
     ModelConfig,
     ModelResponse,
+    ModelStream,
     ProviderType,
     ProviderError
 )
@@ -179,6 +180,88 @@ class GoogleProvider(ModelProvider):
                 original_error=e
             )
 
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> ModelStream:
+        """
+        Generate a response using Gemini, yielding text as it is streamed
+
+        Args:
+            prompt: The user message to send
+            system_prompt: Optional system instructions
+            max_tokens: Maximum tokens to generate (default: model's max_tokens)
+            temperature: Sampling temperature (default: model's default_temperature)
+            **kwargs: Additional parameters passed to the API
+
+        Returns:
+            ModelStream over the generated text chunks
+
+        Raises:
+            ProviderError: If API call fails (raised while iterating)
+        """
+        # Initialize client if needed
+        self._initialize_client()
+
+        if not self.api_key:
+            raise ProviderError(
+                f"No API key configured. Set {self.API_KEY_ENV} environment variable.",
+                provider="google"
+            )
+
+        # Set defaults
+        max_tokens = max_tokens or self.model_config.max_tokens
+        temperature = temperature if temperature is not None else self.model_config.default_temperature
+
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        stream = ModelStream(model=self.model_id, provider="google")
+
+        def chunks() -> Iterator[str]:
+            try:
+                import google.generativeai as genai
+
+                generation_config = genai.GenerationConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=temperature
+                )
+
+                logger.debug(f"Streaming from Google API with model {self.model_id}")
+                response = self._client.generate_content(
+                    full_prompt,
+                    generation_config=generation_config,
+                    stream=True
+                )
+
+                for chunk in response:
+                    if chunk.candidates and chunk.candidates[0].finish_reason:
+                        stream.finish_reason = str(chunk.candidates[0].finish_reason.name)
+                    if getattr(chunk, 'usage_metadata', None):
+                        stream.usage = {
+                            'prompt_tokens': chunk.usage_metadata.prompt_token_count,
+                            'completion_tokens': chunk.usage_metadata.candidates_token_count,
+                            'total_tokens': chunk.usage_metadata.total_token_count,
+                            'input_tokens': chunk.usage_metadata.prompt_token_count,
+                            'output_tokens': chunk.usage_metadata.candidates_token_count,
+                        }
+                    if chunk.parts:
+                        yield chunk.text
+
+            except Exception as e:
+                error_msg = str(e)
+                logger.error(f"Google API error: {error_msg}")
+                raise ProviderError(
+                    f"API call failed: {error_msg}",
+                    provider="google",
+                    original_error=e
+                )
+
+        stream.chunks = chunks()
+        return stream
+
     def validate_api_key(self) -> bool:
         """
         Validate the Google API key
@@ -6,12 +6,13 @@ Implements the ModelProvider interface for OpenAI's GPT models.
 
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 
 from .base import (
     ModelProvider,
     ModelConfig,
     ModelResponse,
+    ModelStream,
     ProviderType,
     ProviderError
 )
@@ -74,7 +75,10 @@ class OpenAIProvider(ModelProvider):
 
         try:
             from openai import OpenAI
-            self._client = OpenAI(api_key=self.api_key)
+            client_kwargs = {"api_key": self.api_key}
+            if self.http_client is not None:
+                client_kwargs["http_client"] = self.http_client
+            self._client = OpenAI(**client_kwargs)
             logger.debug(f"Initialized OpenAI client for model {self.model_id}")
         except ImportError:
             raise ProviderError(
@@ -133,46 +137,9 @@ class OpenAIProvider(ModelProvider):
                 provider="openai"
             )
 
-        # Set defaults
-        max_tokens = max_tokens or self.model_config.max_tokens
-        temperature = temperature if temperature is not None else self.model_config.default_temperature
-
-        # Build messages
-        messages = []
-
-        # Add system prompt if supported and provided
-        if system_prompt and not self._is_reasoning_model():
-            messages.append({"role": "system", "content": system_prompt})
-        elif system_prompt and self._is_reasoning_model():
-            # For reasoning models, prepend system prompt to user message
-            prompt = f"{system_prompt}\n\n{prompt}"
-            logger.debug(f"Model {self.model_id} doesn't support system prompts, prepending to user message")
-
-        messages.append({"role": "user", "content": prompt})
+        api_kwargs = self._build_api_kwargs(prompt, system_prompt, max_tokens, temperature, **kwargs)
 
         try:
-            # Build API call parameters
-            api_kwargs = {
-                "model": self.model_id,
-                "messages": messages,
-            }
-
-            # GPT-5.x and reasoning models use max_completion_tokens instead of max_tokens
-            if self._uses_max_completion_tokens():
-                api_kwargs["max_completion_tokens"] = max_tokens
-                # Only add temperature if not a reasoning model (o1 series doesn't support it)
-                if not self._is_reasoning_model() and temperature != 1.0:
-                    api_kwargs["temperature"] = temperature
-            else:
-                api_kwargs["max_tokens"] = max_tokens
-                if temperature != 1.0:
-                    api_kwargs["temperature"] = temperature
-
-            # Add any additional kwargs (filtered for model compatibility)
-            for key, value in kwargs.items():
-                if key not in api_kwargs:
-                    api_kwargs[key] = value
-
             logger.debug(f"Calling OpenAI API with model {self.model_id}")
             response = self._client.chat.completions.create(**api_kwargs)
 
@@ -215,6 +182,126 @@ class OpenAIProvider(ModelProvider):
                 original_error=e
             )
 
+    def _build_api_kwargs(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build Chat Completions API parameters for a single prompt"""
+        # Set defaults
+        max_tokens = max_tokens or self.model_config.max_tokens
+        temperature = temperature if temperature is not None else self.model_config.default_temperature
+
+        # Build messages
+        messages = []
+
+        # Add system prompt if supported and provided
+        if system_prompt and not self._is_reasoning_model():
+            messages.append({"role": "system", "content": system_prompt})
+        elif system_prompt and self._is_reasoning_model():
+            # For reasoning models, prepend system prompt to user message
+            prompt = f"{system_prompt}\n\n{prompt}"
+            logger.debug(f"Model {self.model_id} doesn't support system prompts, prepending to user message")
+
+        messages.append({"role": "user", "content": prompt})
+
+        # Build API call parameters
+        api_kwargs = {
+            "model": self.model_id,
+            "messages": messages,
+        }
+
+        # GPT-5.x and reasoning models use max_completion_tokens instead of max_tokens
+        if self._uses_max_completion_tokens():
+            api_kwargs["max_completion_tokens"] = max_tokens
+            # Only add temperature if not a reasoning model (o1 series doesn't support it)
+            if not self._is_reasoning_model() and temperature != 1.0:
+                api_kwargs["temperature"] = temperature
+        else:
+            api_kwargs["max_tokens"] = max_tokens
+            if temperature != 1.0:
+                api_kwargs["temperature"] = temperature
+
+        # Add any additional kwargs (filtered for model compatibility)
+        for key, value in kwargs.items():
+            if key not in api_kwargs:
+                api_kwargs[key] = value
+
+        return api_kwargs
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs
+    ) -> ModelStream:
+        """
+        Generate a response using OpenAI GPT, yielding text as it is streamed
+
+        Args:
+            prompt: The user message to send
+            system_prompt: Optional system instructions (not supported by o1 models)
+            max_tokens: Maximum tokens to generate (default: model's max_tokens)
+            temperature: Sampling temperature (default: model's default_temperature)
+            **kwargs: Additional parameters passed to the API
+
+        Returns:
+            ModelStream over the generated text chunks
+
+        Raises:
+            ProviderError: If API call fails (raised while iterating)
+        """
+        # Initialize client if needed
+        self._initialize_client()
+
+        if not self.api_key:
+            raise ProviderError(
+                f"No API key configured. Set {self.API_KEY_ENV} environment variable.",
+                provider="openai"
+            )
+
+        api_kwargs = self._build_api_kwargs(prompt, system_prompt, max_tokens, temperature, **kwargs)
+        api_kwargs["stream"] = True
+        api_kwargs["stream_options"] = {"include_usage": True}
+        stream = ModelStream(model=self.model_id, provider="openai")
+
+        def chunks() -> Iterator[str]:
+            try:
+                logger.debug(f"Streaming from OpenAI API with model {self.model_id}")
+                for chunk in self._client.chat.completions.create(**api_kwargs):
+                    if chunk.usage:
+                        stream.usage = {
+                            'prompt_tokens': chunk.usage.prompt_tokens,
+                            'completion_tokens': chunk.usage.completion_tokens,
+                            'total_tokens': chunk.usage.total_tokens,
+                            'input_tokens': chunk.usage.prompt_tokens,
+                            'output_tokens': chunk.usage.completion_tokens,
+                        }
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.finish_reason:
+                        stream.finish_reason = choice.finish_reason
+                    if choice.delta and choice.delta.content:
+                        yield choice.delta.content
+
+            except Exception as e:
+                error_msg = str(e)
+                logger.error(f"OpenAI API error: {error_msg}")
+                raise ProviderError(
+                    f"API call failed: {error_msg}",
+                    provider="openai",
+                    original_error=e
+                )
+
+        stream.chunks = chunks()
+        return stream
+
     def validate_api_key(self) -> bool:
         """
         Validate the OpenAI API key
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Semantic Report Cache
+
+Caches the AI-written report narrative keyed on the input data so that
+re-running the generator within the same NOAA issuance window does not pay
+for another full LLM generation. Only the narrative is cached: the data
+tables and the markdown/JSON/text formats are rebuilt from the current data
+on every run, so they are never stale.
+
+Three lookup tiers:
+- Exact match: SHA-256 of every input field the prompt renders (in-memory dict, then SQLite)
+- Semantic match: cosine similarity of embeddings of the forecast text (FAISS or numpy),
+  only among entries whose flare/CME data is identical
+- Persistent storage: SQLite table with the stored narratives
+
+The semantic tier is optional and only enabled when sentence-transformers
+is installed. Without it the cache still serves exact repeats.
+"""
+
+import sqlite3
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+# Optional: sentence embeddings for near-duplicate matching
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+
+# Optional: FAISS vector index (falls back to numpy dot products)
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Shared with the fallback report cache in ai_report_generator
+CACHE_DIR = Path.home() / '.cache' / 'space_weather_reports'
+
+# Free-text forecast inputs; near-duplicates of these may share a narrative
+NARRATIVE_FIELDS = ('noaa_discussion', 'uk_met_office', 'sidc_forecast', 'alternative_sources')
+
+# Event data rendered into the prompt; a semantic hit requires these to match exactly
+EVENT_FIELDS = ('flare_summary', 'flares_detailed', 'cmes_observed', 'cmes_predicted')
+
+# Every input field the report prompt renders
+CACHE_KEY_FIELDS = NARRATIVE_FIELDS + EVENT_FIELDS
+
+# The embedding model truncates at 256 tokens, so long text is embedded in
+# ~200-token chunks and the chunk vectors are averaged
+EMBED_CHUNK_CHARS = 800
+
+# Narratives kept in memory (least recently used are evicted)
+MEMORY_MAX_ENTRIES = 32
+
+
+class SemanticReportCache:
+    """
+    Persistent cache of AI report narratives keyed on input data
+
+    Usage:
+        cache = SemanticReportCache()
+        html = cache.lookup(data)
+        if html is None:
+            html = generate(data)
+            cache.store(data, html)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        similarity_threshold: float = 0.97,
+        embedding_model: str = 'all-MiniLM-L6-v2'
+    ):
+        """
+        Initialize the report cache
+
+        Args:
+            db_path: Path to SQLite database file (default: report_cache.db in CACHE_DIR)
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embedding_model: sentence-transformers model used for embeddings
+        """
+        if db_path is None:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            db_path = str(CACHE_DIR / 'report_cache.db')
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+
+        # Guards _memory and the vector index; batch generation calls lookup/store from worker threads
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, str]' = OrderedDict()
+        self._encoder = None
+        self._index = None
+        self._index_hashes = []
+        self._embeddings = []
+
+        self._init_database()
+        if EMBEDDINGS_AVAILABLE:
+            self._load_index()
+
+    def _init_database(self):
+        """Initialize SQLite database with the narrative cache table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS narrative_cache (
+                prompt_hash TEXT PRIMARY KEY,
+                event_hash TEXT NOT NULL,
+                date_bucket TEXT NOT NULL,
+                embedding BLOB,
+                html TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_narrative_bucket ON narrative_cache(date_bucket)')
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _date_bucket() -> str:
+        """Current UTC day, so cached reports never outlive their report date"""
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def canonicalize(data: Dict, fields: tuple = CACHE_KEY_FIELDS) -> str:
+        """
+        Build a canonical string from the given input fields and the UTC day
+
+        Args:
+            data: Report data dictionary
+            fields: Input fields to include (default: every field the prompt renders)
+
+        Returns:
+            Deterministic string representation of the input
+        """
+        payload = {field: data.get(field) for field in fields}
+        payload['date_bucket'] = SemanticReportCache._date_bucket()
+        return json.dumps(payload, sort_keys=True, default=str)
+
+    @staticmethod
+    def hash_key(canonical: str) -> str:
+        """SHA-256 hex digest of a canonical input string"""
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _narrative_text(data: Dict) -> str:
+        """Free-text forecast inputs joined into the string that is embedded"""
+        parts = []
+        for field in NARRATIVE_FIELDS:
+            value = data.get(field)
+            if value:
+                parts.append(value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str))
+        return '\n\n'.join(parts)
+
+    def _get_encoder(self):
+        """Lazily load the sentence-transformers model"""
+        if self._encoder is None:
+            self._encoder = SentenceTransformer(self.embedding_model)
+        return self._encoder
+
+    def _embed(self, text: str):
+        """Embed text as a normalized float32 vector (mean of per-chunk embeddings)"""
+        chunks = [text[i:i + EMBED_CHUNK_CHARS] for i in range(0, len(text), EMBED_CHUNK_CHARS)] or ['']
+        vecs = self._get_encoder().encode(chunks, normalize_embeddings=True)
+        vec = np.asarray(vecs, dtype='float32').mean(axis=0)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec /= norm
+        return vec.reshape(1, -1)
+
+    def _load_index(self):
+        """Load today's stored embeddings into the vector index"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT prompt_hash, embedding FROM narrative_cache
+            WHERE date_bucket = ? AND embedding IS NOT NULL
+        ''', (self._date_bucket(),))
+        rows = cursor.fetchall()
+        conn.close()
+
+        with self._lock:
+            for prompt_hash, blob in rows:
+                self._add_to_index(prompt_hash, np.frombuffer(blob, dtype='float32').reshape(1, -1))
+
+    def _remember(self, prompt_hash: str, html: str):
+        """Put a narrative in the in-memory LRU (caller holds the lock)"""
+        self._memory[prompt_hash] = html
+        self._memory.move_to_end(prompt_hash)
+        if len(self._memory) > MEMORY_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _add_to_index(self, prompt_hash: str, vec):
+        """Add a single embedding to the in-memory vector index (caller holds the lock)"""
+        if FAISS_AVAILABLE:
+            if self._index is None:
+                self._index = faiss.IndexFlatIP(vec.shape[1])
+            self._index.add(vec)
+        else:
+            self._embeddings.append(vec[0])
+        self._index_hashes.append(prompt_hash)
+
+    def _search(self, vec):
+        """
+        Rank stored embeddings by similarity (caller holds the lock)
+
+        Returns:
+            List of (prompt_hash, score) tuples, most similar first
+        """
+        if not self._index_hashes:
+            return []
+
+        if FAISS_AVAILABLE:
+            scores, ids = self._index.search(vec, len(self._index_hashes))
+            ranked = zip(ids[0], scores[0])
+        else:
+            sims = np.stack(self._embeddings) @ vec[0]
+            ranked = ((idx, sims[idx]) for idx in np.argsort(-sims))
+
+        return [(self._index_hashes[int(idx)], float(score)) for idx, score in ranked if idx >= 0]
+
+    def _fetch(self, prompt_hash: str, event_hash: Optional[str] = None) -> Optional[str]:
+        """Load a stored narrative from SQLite by hash (today's entries only)"""
+        query = 'SELECT html FROM narrative_cache WHERE prompt_hash = ? AND date_bucket = ?'
+        params = [prompt_hash, self._date_bucket()]
+        if event_hash is not None:
+            query += ' AND event_hash = ?'
+            params.append(event_hash)
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        conn.close()
+
+        return row[0] if row else None
+
+    def lookup(self, data: Dict) -> Optional[str]:
+        """
+        Look up a cached report narrative for the given input data
+
+        Args:
+            data: Report data dictionary
+
+        Returns:
+            Narrative HTML (without data tables), or None on a cache miss
+        """
+        prompt_hash = self.hash_key(self.canonicalize(data))
+
+        # Exact match fast path
+        with self._lock:
+            html = self._memory.get(prompt_hash)
+            if html is not None:
+                self._memory.move_to_end(prompt_hash)
+        if html is not None:
+            logger.info("Report cache hit (memory)")
+            return html
+
+        html = self._fetch(prompt_hash)
+        if html is not None:
+            logger.info("Report cache hit (exact)")
+            with self._lock:
+                self._remember(prompt_hash, html)
+            return html
+
+        # Semantic match: similar forecast text, identical flare/CME data
+        if not EMBEDDINGS_AVAILABLE:
+            return None
+
+        try:
+            vec = self._embed(self._narrative_text(data))
+            with self._lock:
+                candidates = self._search(vec)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+        event_hash = self.hash_key(self.canonicalize(data, EVENT_FIELDS))
+        for match_hash, score in candidates:
+            if score < self.similarity_threshold:
+                break
+            html = self._fetch(match_hash, event_hash)
+            if html is not None:
+                logger.info(f"Report cache hit (semantic, similarity={score:.3f})")
+                with self._lock:
+                    self._remember(prompt_hash, html)
+                return html
+
+        return None
+
+    def store(self, data: Dict, html: str):
+        """
+        Store a generated report narrative for the given input data
+
+        Args:
+            data: Report data dictionary used to generate the report
+            html: Narrative HTML returned by the model, before data tables are appended
+        """
+        prompt_hash = self.hash_key(self.canonicalize(data))
+        event_hash = self.hash_key(self.canonicalize(data, EVENT_FIELDS))
+
+        vec = None
+        if EMBEDDINGS_AVAILABLE:
+            try:
+                vec = self._embed(self._narrative_text(data))
+            except Exception as e:
+                logger.warning(f"Could not embed report cache entry: {e}")
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO narrative_cache
+                (prompt_hash, event_hash, date_bucket, embedding, html, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (prompt_hash, event_hash, self._date_bucket(), vec.tobytes() if vec is not None else None,
+                  html, int(datetime.now(timezone.utc).timestamp())))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store report in cache: {e}")
+            return
+
+        with self._lock:
+            self._remember(prompt_hash, html)
+            if vec is not None:
+                self._add_to_index(prompt_hash, vec)
@@ -247,8 +247,8 @@ class SpaceWeatherReportGenerator:
                 end_time = datetime.now(timezone.utc)
 
             # Use enhanced CME tracker
-            tracker = EnhancedCMETracker()
-            cmes = tracker.get_cmes_for_period(start_time, end_time)
+            with EnhancedCMETracker() as tracker:
+                cmes = tracker.get_cmes_for_period(start_time, end_time)
 
             self.logger.info(f"Retrieved {len(cmes)} CMEs for report period")
             return cmes
@@ -280,10 +280,10 @@ class SpaceWeatherReportGenerator:
                 end_time = datetime.now(timezone.utc) + timedelta(days=3)
 
             # Use enhanced CME tracker with uncertainty window
-            tracker = EnhancedCMETracker()
-            arrivals = tracker.get_cmes_with_arrivals_in_window(
-                start_time, end_time, uncertainty_hours
-            )
+            with EnhancedCMETracker() as tracker:
+                arrivals = tracker.get_cmes_with_arrivals_in_window(
+                    start_time, end_time, uncertainty_hours
+                )
 
             self.logger.info(f"Retrieved {len(arrivals)} predicted CME arrivals for forecast period")
             return arrivals